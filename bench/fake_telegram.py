@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+# Пользователь-бот, которого возвращает getMe
+BOT_USER = {
+    "id": 100000,
+    "is_bot": True,
+    "first_name": "K-89 Bench",
+    "username": "k89_bench_bot",
+}
+
+
+# Локальный сервер, отвечающий на запросы Bot API вместо api.telegram.org
+class FakeTelegramServer:
+    """Принимает запросы Bot API и отвечает как Telegram, не отправляя
+    сообщений. Запоминает последнее сообщение бота в каждом чате, чтобы
+    следующий callback_query нёс актуальную клавиатуру (как в клиенте).
+
+    latency — искусственная задержка ответа в секундах.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0):
+        self.latency = latency
+        self.calls = Counter()
+        self._messages = {}
+        self._next_message_id = 1
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-telegram", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def last_message(self, chat_id: int) -> dict:
+        """Последнее сообщение бота в чате (или пустое сообщение)"""
+        with self._lock:
+            message = self._messages.get(chat_id)
+            if message is None:
+                message = self._store_message(chat_id, None, "", None)
+            return dict(message)
+
+    def _store_message(self, chat_id, message_id, text, reply_markup) -> dict:
+        if message_id is None:
+            message_id = self._next_message_id
+            self._next_message_id += 1
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": text,
+        }
+        if reply_markup:
+            message["reply_markup"] = reply_markup
+        self._messages[chat_id] = message
+        return message
+
+    def handle(self, method: str, params: dict):
+        """Результат метода Bot API"""
+        self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if method == "getMe":
+            return BOT_USER
+        if method not in ("sendMessage", "editMessageText", "editMessageReplyMarkup"):
+            return True
+
+        chat_id = int(params["chat_id"])
+        reply_markup = params.get("reply_markup")
+        if reply_markup:
+            reply_markup = json.loads(reply_markup)
+        with self._lock:
+            previous = self._messages.get(chat_id, {})
+            if method == "sendMessage":
+                message_id = None
+            else:
+                message_id = int(params.get("message_id", 0)) or None
+            text = params.get("text", previous.get("text", ""))
+            return self._store_message(chat_id, message_id, text, reply_markup)
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Соединения httpx переиспользуются, как с настоящим Bot API
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело уходят разными записями: с алгоритмом Нейгла
+            # тело ждало бы отложенного ACK клиента (~40 мс на каждый запрос)
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                # Путь вида /bot<токен>/<метод>
+                method = self.path.rsplit("/", 1)[-1]
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(body or b"{}")
+                else:
+                    params = dict(parse_qsl(body.decode()))
+
+                response = json.dumps(
+                    {"ok": True, "result": fake.handle(method, params)}
+                )
+                payload = response.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
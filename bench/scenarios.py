@@ -0,0 +1,71 @@
+import random
+import callbacks as cb
+from database import OrderStatus
+
+# Сценарии нагрузочного теста — последовательности действий одного
+# пользователя. Действие — ("command", "/start") или ("callback", данные
+# кнопки), как если бы пользователь отправил команду или нажал кнопку.
+
+
+def browse(menu_ids: list, rng: random.Random) -> list:
+    """Просмотр меню без заказа"""
+    first, second = rng.sample(menu_ids, 2)
+    return [
+        ("command", "/start"),
+        ("callback", cb.MENU()),
+        ("callback", cb.ITEM(first)),
+        ("callback", cb.MENU()),
+        ("callback", cb.ITEM(second)),
+        ("callback", cb.MAIN()),
+        ("callback", cb.ABOUT()),
+    ]
+
+
+def cart_edit(menu_ids: list, rng: random.Random) -> list:
+    """Изменение количества, добавление в корзину и её очистка"""
+    item_id = rng.choice(menu_ids)
+    return [
+        ("callback", cb.MENU()),
+        ("callback", cb.ITEM(item_id)),
+        ("callback", cb.QUANTITY(item_id, 1)),
+        ("callback", cb.QUANTITY(item_id, 1)),
+        ("callback", cb.QUANTITY(item_id, -1)),
+        ("callback", cb.ADD_TO_CART(item_id)),
+        ("callback", cb.VIEW_CART()),
+        ("callback", cb.CLEAR_CART()),
+    ]
+
+
+def checkout(menu_ids: list, rng: random.Random) -> list:
+    """Оформление заказа из двух товаров и просмотр истории"""
+    first, second = rng.sample(menu_ids, 2)
+    return [
+        ("callback", cb.MENU()),
+        ("callback", cb.ITEM(first)),
+        ("callback", cb.QUANTITY(first, 1)),
+        ("callback", cb.ADD_TO_CART(first)),
+        ("callback", cb.MENU()),
+        ("callback", cb.ITEM(second)),
+        ("callback", cb.ADD_TO_CART(second)),
+        ("callback", cb.VIEW_CART()),
+        ("callback", cb.CONFIRM_ORDER()),
+        ("callback", cb.ORDER_TIME(rng.choice([0, 15, 30]))),
+        ("callback", cb.MY_ORDERS()),
+    ]
+
+
+def admin_completions(order_ids: list) -> list:
+    """Бариста открывает доску и выполняет заказы"""
+    actions = [("callback", cb.ADMIN_PANEL()), ("callback", cb.ORDERS_BOARD())]
+    for order_id in order_ids:
+        actions.append(("callback", cb.SET_ORDER_STATUS(order_id, OrderStatus.READY)))
+    actions.append(("callback", cb.ADMIN_STATS()))
+    return actions
+
+
+# Сценарии покупателей: имя -> функция, строящая последовательность действий
+CUSTOMER_SCENARIOS = {
+    "browse": browse,
+    "cart_edit": cart_edit,
+    "checkout": checkout,
+}
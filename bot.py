@@ -1,25 +1,90 @@
+import time
+
+# Начало импорта модулей бота: от него отсчитывается время запуска
+STARTED_AT = time.perf_counter()
+
 import os
-from dotenv import load_dotenv
+import asyncio
+import hashlib
+import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand
 from telegram.ext import (
     Application,
     CommandHandler,
-    CallbackQueryHandler,
     MessageHandler,
     filters,
     ContextTypes,
 )
-from database import Database
-
-load_dotenv()
-
-db = Database()
+from config import (
+    DatabaseConfig,
+    PersistenceConfig,
+    BotConfig,
+    MetricsConfig,
+    LoggingConfig,
+)
+from database import AsyncDatabase, OrderStatus
+import callbacks as cb
+from callbacks import CallbackRouter
+from persistence import DatabasePersistence
+from update_processor import PerUserUpdateProcessor
+from notifier import Notifier
+from cache import RenderCache
+from instrumentation import (
+    InstrumentedHTTPXRequest,
+    StartupTimer,
+    instrument_handlers,
+    start_metrics_server,
+)
+from tracing import enable_tracing, setup_logging, update_log_fields
+
+logger = logging.getLogger(__name__)
+
+# Подключение к БД создаётся при первом запросе (или в post_init), а не при
+# импорте модуля
+db = AsyncDatabase(max_workers=DatabaseConfig.DB_EXECUTOR_WORKERS)
+startup = StartupTimer(STARTED_AT)
+notifier = Notifier(
+    global_rate=BotConfig.NOTIFY_GLOBAL_RATE,
+    per_chat_rate=BotConfig.NOTIFY_PER_CHAT_RATE,
+    max_retries=BotConfig.NOTIFY_MAX_RETRIES,
+)
 
 # Состояния диалога добавления товара
 ADD_ITEM_NAME = 1
 ADD_ITEM_DESCRIPTION = 2
 ADD_ITEM_PRICE = 3
 
+# Количество заказов на странице истории
+ORDERS_PAGE_SIZE = 5
+
+# Количество заказов на странице доски активных заказов
+ACTIVE_ORDERS_PAGE_SIZE = 5
+
+# Кнопки доски: текущий статус заказа -> [(текст кнопки, новый статус)]
+ORDER_STATUS_ACTIONS = {
+    OrderStatus.ACCEPTED: [
+        ("👨‍🍳 В работу", OrderStatus.IN_PROGRESS),
+        ("❌ Отменить", OrderStatus.CANCELLED),
+    ],
+    OrderStatus.IN_PROGRESS: [
+        ("✅ Готов", OrderStatus.READY),
+        ("❌ Отменить", OrderStatus.CANCELLED),
+    ],
+    OrderStatus.READY: [("📦 Выдан", OrderStatus.PICKED_UP)],
+}
+
+# Ответ администратору после смены статуса
+ORDER_STATUS_CHANGED = {
+    OrderStatus.IN_PROGRESS: "Заказ #{} взят в работу.",
+    OrderStatus.READY: "Заказ #{} отмечен как выполненный! Клиент уведомлен.",
+    OrderStatus.PICKED_UP: "Заказ #{} выдан.",
+    OrderStatus.CANCELLED: "Заказ #{} отменён. Клиент уведомлен.",
+}
+
+# Карточки товаров, которые сейчас перерисовываются или недавно перерисованы:
+# (chat_id, message_id). Нажатия по ним только меняют количество
+pending_card_edits = set()
+
 # Состояния диалога редактирования товара
 EDIT_ITEM_SELECT = 1
 EDIT_ITEM_FIELD = 2
@@ -37,33 +102,185 @@ async def setup_commands(application: Application):
     await application.bot.set_my_commands(commands)
 
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик команды /start"""
-    user = update.effective_user
+# Готовые экраны: одинаковые для всех пользователей клавиатуры и тексты
+# строятся один раз и перестраиваются только при изменении меню
+render_cache = RenderCache()
+
+MAIN_SCREEN_TEXT = "✨ Добро пожаловать в 𝓚-89 𝓒𝓸𝓯𝓯𝓮𝓮, {}! ✨\n\n" "Выберите действие 👇"
+MENU_SCREEN_TEXT = "☕️ *Наше меню:*\n\n" "Выберите напиток для заказа 👇"
+ADMIN_PANEL_TEXT = "👑 *Админка:*\n\n" "Выберите действие 👇"
+ORDER_TIME_TEXT = "🕒 *Выберите желаемое время получения заказа:*"
+ABOUT_TEXT = (
+    "✨ *𝓚-89 𝓒𝓸𝓯𝓯𝓮𝓮* - ваша любимая кофейня! ✨\n\n"
+    "🕐 *Режим работы:*\n"
+    "Пн-Вс: 9:00 - 21:00\n\n"
+    "📍 *Адрес:*\n"
+    "ЯНАО, г. Новый Уренгой\n"
+    "м-рн Оптимистов, 3, корп. 1\n\n"
+    "📱 *Контакты:*\n"
+    "Telegram: @CoffeeNur89\n\n"
+    "✨ *Акции и предложения:*\n"
+    "При покупке двух упаковок чая – получите скидку 15% на обе!\n\n"
+    "Мы варим кофе с любовью и заботой о каждом госте! 💝\n"
+    "Ждем вас в 𝓚-89 𝓒𝓸𝓯𝓯𝓮𝓮, чтобы подарить вам незабываемый вкус и уют! ✨\n\n"
+    "🛟 По вопросам работы бота обращайтесь: @Lill\\_Polly"
+)
 
-    # Создаем пользователя в базе данных
-    db.create_user_if_not_exists(user.id, user.username)
 
+def build_main_keyboard(role: str) -> InlineKeyboardMarkup:
+    """Главное меню; у администратора есть кнопка админки"""
     keyboard = [
-        (InlineKeyboardButton("🍵 Меню", callback_data="menu"),),
+        (InlineKeyboardButton("🍵 Меню", callback_data=cb.MENU()),),
         (
-            InlineKeyboardButton("🛒 Корзина", callback_data="view_cart"),
-            InlineKeyboardButton("📝 Мои заказы", callback_data="my_orders"),
+            InlineKeyboardButton("🛒 Корзина", callback_data=cb.VIEW_CART()),
+            InlineKeyboardButton("📝 Мои заказы", callback_data=cb.MY_ORDERS()),
         ),
-        (InlineKeyboardButton("ℹ️ О нас", callback_data="about"),),
+        (InlineKeyboardButton("ℹ️ О нас", callback_data=cb.ABOUT()),),
     ]
-
-    # Проверка на администратора
-    if db.is_admin(user.id):
+    if role == "admin":
         keyboard.append(
-            (InlineKeyboardButton("👑 Админка", callback_data="admin_panel"),)
+            (InlineKeyboardButton("👑 Админка", callback_data=cb.ADMIN_PANEL()),)
         )
+    return InlineKeyboardMarkup(keyboard)
+
+
+def build_menu_keyboard(menu_items: list) -> InlineKeyboardMarkup:
+    """Кнопки товаров меню"""
+    keyboard = [
+        (
+            InlineKeyboardButton(
+                f"{item['name']} - {item['price']}₽",
+                callback_data=cb.ITEM(item["id"]),
+            ),
+        )
+        for item in menu_items
+    ]
+    keyboard.append((InlineKeyboardButton("🔙 Назад", callback_data=cb.MAIN()),))
+    return InlineKeyboardMarkup(keyboard)
+
+
+def build_about_keyboard() -> InlineKeyboardMarkup:
+    """Ссылки на карту, канал и поддержку"""
+    return InlineKeyboardMarkup(
+        (
+            (
+                InlineKeyboardButton(
+                    "📍 Показать на карте", url="https://yandex.ru/maps/-/CHaBEOmM"
+                ),
+            ),
+            (InlineKeyboardButton("✈️ Telegram", url="https://t.me/CoffeeNur89"),),
+            (InlineKeyboardButton("🛟 Тех. поддержка", url="https://t.me/Lill_Polly"),),
+            (InlineKeyboardButton("🔙 Назад", callback_data=cb.MAIN()),),
+        )
+    )
+
+
+def build_admin_panel_keyboard() -> InlineKeyboardMarkup:
+    """Разделы админки"""
+    return InlineKeyboardMarkup(
+        (
+            (
+                InlineKeyboardButton(
+                    "📊 Статистика заказов", callback_data=cb.ADMIN_STATS()
+                ),
+            ),
+            (
+                InlineKeyboardButton(
+                    "📦 Управление заказами", callback_data=cb.ORDERS_BOARD()
+                ),
+            ),
+            (
+                InlineKeyboardButton(
+                    "🍽 Управление меню", callback_data=cb.MENU_MANAGEMENT()
+                ),
+            ),
+            (
+                InlineKeyboardButton(
+                    "👥 Управление админами", callback_data=cb.ADMIN_MANAGEMENT()
+                ),
+            ),
+            (InlineKeyboardButton("🔙 Назад", callback_data=cb.MAIN()),),
+        )
+    )
+
+
+def build_back_to_menu_keyboard() -> InlineKeyboardMarkup:
+    """Единственная кнопка «В меню»"""
+    return InlineKeyboardMarkup(
+        ((InlineKeyboardButton("🔙 В меню", callback_data=cb.MENU()),),)
+    )
+
+
+def build_cart_keyboard() -> InlineKeyboardMarkup:
+    """Действия с непустой корзиной"""
+    return InlineKeyboardMarkup(
+        (
+            (
+                InlineKeyboardButton(
+                    "✅ Оформить заказ", callback_data=cb.CONFIRM_ORDER()
+                ),
+            ),
+            (
+                InlineKeyboardButton(
+                    "🗑 Очистить корзину", callback_data=cb.CLEAR_CART()
+                ),
+            ),
+            (InlineKeyboardButton("🔙 В меню", callback_data=cb.MENU()),),
+        )
+    )
+
+
+def build_order_time_keyboard() -> InlineKeyboardMarkup:
+    """Варианты времени получения заказа"""
+    return InlineKeyboardMarkup(
+        (
+            (
+                InlineKeyboardButton(
+                    "⚡️ Как можно быстрее", callback_data=cb.ORDER_TIME(0)
+                ),
+            ),
+            (
+                InlineKeyboardButton(
+                    "⏰ Через 15 минут", callback_data=cb.ORDER_TIME(15)
+                ),
+            ),
+            (
+                InlineKeyboardButton(
+                    "⏰ Через 30 минут", callback_data=cb.ORDER_TIME(30)
+                ),
+            ),
+            (
+                InlineKeyboardButton(
+                    "⏰ Через 45 минут", callback_data=cb.ORDER_TIME(45)
+                ),
+            ),
+            (InlineKeyboardButton("⏰ Через 1 час", callback_data=cb.ORDER_TIME(60)),),
+            (InlineKeyboardButton("🔙 Назад", callback_data=cb.VIEW_CART()),),
+        )
+    )
+
+
+def static_keyboard(build) -> InlineKeyboardMarkup:
+    """Клавиатура, не зависящая от данных (строится один раз)"""
+    return render_cache.get(build.__name__, 0, build)
+
+
+async def main_keyboard(user_id: int) -> InlineKeyboardMarkup:
+    """Клавиатура главного меню для роли пользователя"""
+    role = "admin" if await db.is_admin(user_id) else "customer"
+    return render_cache.get(("main", role), 0, build_main_keyboard, role)
+
+
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /start"""
+    user = update.effective_user
+
+    # Создаем пользователя в базе данных
+    await db.create_user_if_not_exists(user.id, user.username)
 
-    reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text(
-        f"✨ Добро пожаловать в 𝓚-89 𝓒𝓸𝓯𝓯𝓮𝓮, {user.first_name}! ✨\n\n"
-        "Выберите действие 👇",
-        reply_markup=reply_markup,
+        MAIN_SCREEN_TEXT.format(user.first_name),
+        reply_markup=await main_keyboard(user.id),
     )
 
 
@@ -73,45 +290,57 @@ async def menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
         await query.answer()
         message = query.edit_message_text
+
+        # Возврат из карточки товара: отложенная перерисовка её не вернёт
+        card = context.user_data.get("item_card")
+        if card and card["message_id"] == query.message.message_id:
+            context.user_data.pop("item_card")
     else:
         message = update.message.reply_text
 
-    menu_items = db.get_menu_items()
-    keyboard = []
-    for item in menu_items:
-        keyboard.append(
-            [
-                InlineKeyboardButton(
-                    f"{item['name']} - {item['price']}₽",
-                    callback_data=f"order_{item['id']}",
-                )
-            ]
-        )
-    keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")])
-
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await message(
-        "☕️ *Наше меню:*\n\n" "Выберите напиток для заказа 👇",
-        reply_markup=reply_markup,
-        parse_mode="Markdown",
+    # Версию берём до загрузки меню: если меню обновится между этими
+    # строками, клавиатура просто перестроится при следующем обращении
+    menu_version = db.menu_cache.version
+    menu_items = await db.get_menu_items()
+    reply_markup = render_cache.get(
+        "menu", menu_version, build_menu_keyboard, menu_items
     )
+    await message(MENU_SCREEN_TEXT, reply_markup=reply_markup, parse_mode="Markdown")
+
 
+async def orders_handler(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    direction: str = None,
+    order_id: int = None,
+):
+    """Обработчик команды /orders и кнопки мои заказы
 
-async def orders_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик команды /orders и кнопки мои заказы"""
+    direction и order_id — навигация по страницам: заказы старше (older)
+    или новее (newer) заказа order_id.
+    """
+    before_id = after_id = None
     if update.callback_query:
         query = update.callback_query
         await query.answer()
         user = query.from_user
         message = query.edit_message_text
+
+        if direction == "older":
+            before_id = order_id
+        elif direction == "newer":
+            after_id = order_id
     else:
         user = update.effective_user
         message = update.message.reply_text
 
-    orders = db.get_user_orders(user.id)
+    page = await db.get_user_orders_page(
+        user.id, before_id=before_id, after_id=after_id, limit=ORDERS_PAGE_SIZE
+    )
+    orders = page["orders"]
 
     if not orders:
-        keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")]]
+        keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data=cb.MAIN())]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         await message("У вас пока нет заказов.", reply_markup=reply_markup)
         return
@@ -125,7 +354,23 @@ async def orders_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text += f"  • {item['name']} × {item['quantity']} = {item['subtotal']}₽\n"
         text += f"💰 Итого: {order['total']}₽\n\n"
 
-    keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")]]
+    navigation = []
+    if page["has_newer"]:
+        navigation.append(
+            InlineKeyboardButton(
+                "⬅️ Новее", callback_data=cb.MY_ORDERS_PAGE("newer", orders[0]["id"])
+            )
+        )
+    if page["has_older"]:
+        navigation.append(
+            InlineKeyboardButton(
+                "Старее ➡️", callback_data=cb.MY_ORDERS_PAGE("older", orders[-1]["id"])
+            )
+        )
+
+    keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data=cb.MAIN())]]
+    if navigation:
+        keyboard.insert(0, navigation)
     reply_markup = InlineKeyboardMarkup(keyboard)
     await message(text, reply_markup=reply_markup, parse_mode="Markdown")
 
@@ -140,37 +385,13 @@ async def about_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         else:
             message = update.message.reply_text
 
-        about_text = (
-            "✨ *𝓚-89 𝓒𝓸𝓯𝓯𝓮𝓮* - ваша любимая кофейня! ✨\n\n"
-            "🕐 *Режим работы:*\n"
-            "Пн-Вс: 9:00 - 21:00\n\n"
-            "📍 *Адрес:*\n"
-            "ЯНАО, г. Новый Уренгой\n"
-            "м-рн Оптимистов, 3, корп. 1\n\n"
-            "📱 *Контакты:*\n"
-            "Telegram: @CoffeeNur89\n\n"
-            "✨ *Акции и предложения:*\n"
-            "При покупке двух упаковок чая – получите скидку 15% на обе!\n\n"
-            "Мы варим кофе с любовью и заботой о каждом госте! 💝\n"
-            "Ждем вас в 𝓚-89 𝓒𝓸𝓯𝓯𝓮𝓮, чтобы подарить вам незабываемый вкус и уют! ✨\n\n"
-            "🛟 По вопросам работы бота обращайтесь: @Lill\\_Polly"
+        await message(
+            ABOUT_TEXT,
+            reply_markup=static_keyboard(build_about_keyboard),
+            parse_mode="Markdown",
         )
-
-        keyboard = [
-            [
-                InlineKeyboardButton(
-                    "📍 Показать на карте", url="https://yandex.ru/maps/-/CHaBEOmM"
-                )
-            ],
-            [InlineKeyboardButton("✈️ Telegram", url="https://t.me/CoffeeNur89")],
-            [InlineKeyboardButton("🛟 Тех. поддержка", url="https://t.me/Lill_Polly")],
-            [InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")],
-        ]
-
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await message(about_text, reply_markup=reply_markup, parse_mode="Markdown")
-    except Exception as e:
-        print(f"Ошибка в about_handler: {e}")
+    except Exception:
+        logger.exception("Error in about_handler")
         if update.message:
             await update.message.reply_text(
                 "Произошла ошибка при загрузке информации. Попробуйте позже."
@@ -182,25 +403,13 @@ async def admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к панели администратора.")
         return
 
-    keyboard = [
-        [InlineKeyboardButton("📊 Статистика заказов", callback_data="admin_stats")],
-        [InlineKeyboardButton("📦 Управление заказами", callback_data="manage_orders")],
-        [InlineKeyboardButton("🍽 Управление меню", callback_data="menu_management")],
-        [
-            InlineKeyboardButton(
-                "👥 Управление админами", callback_data="admin_management"
-            )
-        ],
-        [InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")],
-    ]
-
     await query.edit_message_text(
-        "👑 *Админка:*\n\n" "Выберите действие 👇",
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        ADMIN_PANEL_TEXT,
+        reply_markup=static_keyboard(build_admin_panel_keyboard),
         parse_mode="Markdown",
     )
 
@@ -210,67 +419,134 @@ async def back_to_main(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    keyboard = [
-        [InlineKeyboardButton("🍵 Меню", callback_data="menu")],
-        [
-            InlineKeyboardButton("🛒 Корзина", callback_data="view_cart"),
-            InlineKeyboardButton("📝 Мои заказы", callback_data="my_orders"),
-        ],
-        [InlineKeyboardButton("ℹ️ О нас", callback_data="about")],
-    ]
-
-    # Проверка на администратора
-    if db.is_admin(query.from_user.id):
-        keyboard.append(
-            [InlineKeyboardButton("👑 Админка", callback_data="admin_panel")]
-        )
-
-    reply_markup = InlineKeyboardMarkup(keyboard)
     await query.edit_message_text(
-        f"✨ Добро пожаловать в 𝓚-89 𝓒𝓸𝓯𝓯𝓮𝓮, {query.from_user.first_name}! ✨\n\n"
-        "Выберите действие 👇",
-        reply_markup=reply_markup,
+        MAIN_SCREEN_TEXT.format(query.from_user.first_name),
+        reply_markup=await main_keyboard(query.from_user.id),
     )
 
 
-async def handle_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_order(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, item_id: int
+):
     """Обработчик нажатия на товар в меню"""
     query = update.callback_query
     await query.answer()
 
-    item_id = int(query.data.split("_")[1])
-    item = db.get_menu_item(item_id)
+    item = await db.get_menu_item(item_id)
 
     if not item:
         await query.edit_message_text(
             "Товар не найден",
             reply_markup=InlineKeyboardMarkup(
-                [[InlineKeyboardButton("🔙 Назад в меню", callback_data="menu")]]
+                [[InlineKeyboardButton("🔙 Назад в меню", callback_data=cb.MENU())]]
             ),
         )
         return
 
+    card = open_item_card(context, query.message.message_id, item, 1)
+    text, reply_markup = render_item_card(card)
+    await query.edit_message_text(
+        text, reply_markup=reply_markup, parse_mode="Markdown"
+    )
+
+
+def open_item_card(context, message_id: int, item: dict, quantity: int) -> dict:
+    """Запомнить открытую карточку товара в user_data
+
+    В карточке есть всё, что нужно для перерисовки, поэтому нажатия ➕/➖
+    не обращаются ни к БД, ни к кэшу меню. shown — количество, которое
+    сейчас видно в сообщении.
+    """
+    card = {
+        "message_id": message_id,
+        "item_id": item["id"],
+        "name": item["name"],
+        "price": item["price"],
+        "quantity": quantity,
+        "shown": quantity,
+    }
+    context.user_data["item_card"] = card
+    return card
+
+
+def get_item_card(context, message_id: int, item_id: int):
+    """Карточка товара из user_data, если она открыта в этом сообщении"""
+    card = context.user_data.get("item_card")
+    if card and card["message_id"] == message_id and card["item_id"] == item_id:
+        return card
+    return None
+
+
+def render_item_card(card: dict):
+    """Текст и клавиатура карточки товара с выбором количества"""
+    item_id = card["item_id"]
     keyboard = [
         [
-            InlineKeyboardButton("➖", callback_data=f"decrease_{item_id}"),
-            InlineKeyboardButton("1", callback_data="quantity"),
-            InlineKeyboardButton("➕", callback_data=f"increase_{item_id}"),
+            InlineKeyboardButton("➖", callback_data=cb.QUANTITY(item_id, -1)),
+            InlineKeyboardButton(
+                str(card["quantity"]), callback_data=cb.QUANTITY_VALUE()
+            ),
+            InlineKeyboardButton("➕", callback_data=cb.QUANTITY(item_id, 1)),
         ],
         [
             InlineKeyboardButton(
-                "🛒 Добавить в корзину", callback_data=f"add_to_cart_{item_id}"
+                "🛒 Добавить в корзину", callback_data=cb.ADD_TO_CART(item_id)
             )
         ],
-        [InlineKeyboardButton("🔙 Назад в меню", callback_data="menu")],
+        [InlineKeyboardButton("🔙 Назад в меню", callback_data=cb.MENU())],
     ]
+    text = (
+        f"✨ *{card['name']}*\n" f"💰 Цена: {card['price']}₽\n\n" "Выберите количество 👇"
+    )
+    return text, InlineKeyboardMarkup(keyboard)
 
-    await query.edit_message_text(
-        f"✨ *{item['name']}*\n"
-        f"💰 Цена: {item['price']}₽\n\n"
-        "Выберите количество 👇",
-        reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode="Markdown",
+
+# Названия периодов метрик кухни
+METRICS_PERIOD_TITLES = {"day": "день", "week": "неделю", "month": "месяц"}
+
+
+def format_duration(seconds) -> str:
+    """Длительность для статистики: «4 мин 30 с» или «—», если данных нет"""
+    if seconds is None:
+        return "—"
+    hours, seconds = divmod(round(seconds), 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours:
+        return f"{hours} ч {minutes} мин"
+    if minutes:
+        return f"{minutes} мин {seconds} с"
+    return f"{seconds} с"
+
+
+def format_kitchen_metrics(metrics: dict) -> str:
+    """Текст метрик кухни с гистограммой заказов по часам"""
+    text = f"*⏱ Кухня за {METRICS_PERIOD_TITLES[metrics['period']]}:*\n"
+    text += (
+        f"🧑‍🍳 Приготовление: медиана {format_duration(metrics['prep_p50'])}, "
+        f"90% заказов — до {format_duration(metrics['prep_p90'])}\n"
+    )
+    text += (
+        f"🔔 Уведомление после готовности: медиана "
+        f"{format_duration(metrics['notify_p50'])}, "
+        f"90% — до {format_duration(metrics['notify_p90'])}\n"
     )
+    text += (
+        f"📈 Заказов в час: в среднем {metrics['orders_per_hour_avg']:.1f}, "
+        f"максимум {metrics['orders_per_hour_max']}\n"
+    )
+    text += f"🕒 В очереди сейчас: {metrics['queue_depth']}"
+    if metrics["oldest_wait"] is not None:
+        text += f", самый старый ждёт {format_duration(metrics['oldest_wait'])}"
+    text += "\n"
+
+    hourly = metrics["hourly"]
+    if hourly:
+        peak = max(hourly.values())
+        text += "\n*Заказы по часам:*\n"
+        for hour, count in hourly.items():
+            bar = "▇" * max(1, round(count * 10 / peak))
+            text += f"`{hour:02d}:00` {bar} {count}\n"
+    return text
 
 
 async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -278,15 +554,16 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
 
-    # Получаем статистику за разные периоды
-    all_time_stats = db.get_orders_stats()
-    day_stats = db.get_orders_stats("day")
-    week_stats = db.get_orders_stats("week")
-    month_stats = db.get_orders_stats("month")
+    # Получаем статистику за все периоды одним запросом
+    stats = await db.get_orders_stats_summary()
+    all_time_stats = stats["all"]
+    day_stats = stats["day"]
+    week_stats = stats["week"]
+    month_stats = stats["month"]
 
     text = "📊 *Статистика заказов:*\n\n"
 
@@ -311,12 +588,19 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text += f"🕒 Выполнено: {all_time_stats['completed_orders']}\n\n"
 
     text += "*Последние заказы:*\n"
-    for order in all_time_stats["orders"]:
+    for order in stats["orders"]:
         text += f"#{order['id']} - {order['status']} - {order['total']}₽\n"
 
+    metrics = await db.get_kitchen_metrics(MetricsConfig.METRICS_PERIOD)
+    text += "\n" + format_kitchen_metrics(metrics)
+
     keyboard = [
-        [InlineKeyboardButton("📦 Управление заказами", callback_data="manage_orders")],
-        [InlineKeyboardButton("🔙 Назад", callback_data="admin_panel")],
+        [
+            InlineKeyboardButton(
+                "📦 Управление заказами", callback_data=cb.ORDERS_BOARD()
+            )
+        ],
+        [InlineKeyboardButton("🔙 Назад", callback_data=cb.ADMIN_PANEL())],
     ]
 
     await query.edit_message_text(
@@ -324,32 +608,21 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def manage_orders(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Управление заказами"""
-    query = update.callback_query
-    await query.answer()
-
-    if not db.is_admin(query.from_user.id):
-        await query.edit_message_text("У вас нет доступа к этой функции.")
-        return
-
-    orders = db.get_all_orders(status="Принят")
-
-    if not orders:
-        keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="admin_panel")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(
-            "Нет активных заказов.", reply_markup=reply_markup
-        )
-        return
-
-    text = "📦 *Активные заказы:*\n\n"
+def render_orders_board(page_data: dict, sort: str, page: int):
+    """Текст и клавиатура страницы доски активных заказов"""
+    orders = page_data["orders"]
+    sort_title = "по времени получения" if sort == "desired" else "по времени заказа"
+    text = (
+        f"📦 *Активные заказы ({page_data['total']})*\n"
+        f"Сортировка: {sort_title}, страница {page + 1}\n\n"
+    )
     keyboard = []
 
     for order in orders:
         text += (
             f"*Заказ #{order['id']}*\n"
-            f"⏰ Время получения: {order.get('desired_time', 'Не указано')}\n"
+            f"📌 Статус: {order['status']}\n"
+            f"⏰ Время получения: {order.get('desired_time') or 'Не указано'}\n"
             f"📱 Контакт: @{order.get('username', 'Нет username')}\n"
             f"💰 Сумма: {order['total']}₽\n"
             "Состав заказа:\n"
@@ -361,37 +634,188 @@ async def manage_orders(update: Update, context: ContextTypes.DEFAULT_TYPE):
         keyboard.append(
             [
                 InlineKeyboardButton(
-                    f"✅ Выполнить #{order['id']}",
-                    callback_data=f"complete_order_{order['id']}",
+                    f"{title} #{order['id']}",
+                    callback_data=cb.SET_ORDER_STATUS(order["id"], new_status),
+                )
+                for title, new_status in ORDER_STATUS_ACTIONS.get(
+                    OrderStatus(order["status"]), []
                 )
             ]
         )
 
-    keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data="admin_panel")])
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    navigation = []
+    if page > 0:
+        navigation.append(
+            InlineKeyboardButton(
+                "⬅️ Назад", callback_data=cb.ORDERS_BOARD_PAGE(sort, page - 1)
+            )
+        )
+    if page_data["has_more"]:
+        navigation.append(
+            InlineKeyboardButton(
+                "Далее ➡️", callback_data=cb.ORDERS_BOARD_PAGE(sort, page + 1)
+            )
+        )
+    if navigation:
+        keyboard.append(navigation)
+
+    other_sort = "created" if sort == "desired" else "desired"
+    keyboard.append(
+        [
+            InlineKeyboardButton(
+                (
+                    "🔃 По времени заказа"
+                    if other_sort == "created"
+                    else "🔃 По времени получения"
+                ),
+                callback_data=cb.ORDERS_BOARD_PAGE(other_sort, 0),
+            )
+        ]
+    )
+    keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data=cb.ADMIN_PANEL())])
+    return text, keyboard
+
+
+async def show_orders_board(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, sort: str, page: int
+):
+    """Показать страницу доски активных заказов в сообщении с кнопкой.
+
+    Загружается только одна страница заказов. Если текст страницы не
+    изменился с прошлого показа в этом сообщении, сообщение не редактируется.
+    """
+    query = update.callback_query
+    # Номер страницы приходит из кнопки: отрицательный OFFSET PostgreSQL отвергнет
+    page = max(page, 0)
+    page_data = await db.get_active_orders_page(
+        sort=sort, offset=page * ACTIVE_ORDERS_PAGE_SIZE, limit=ACTIVE_ORDERS_PAGE_SIZE
+    )
+
+    # Последняя страница опустела (заказы выполнены) — переходим на предыдущую
+    if not page_data["orders"] and page > 0 and page_data["total"]:
+        page = (page_data["total"] - 1) // ACTIVE_ORDERS_PAGE_SIZE
+        page_data = await db.get_active_orders_page(
+            sort=sort,
+            offset=page * ACTIVE_ORDERS_PAGE_SIZE,
+            limit=ACTIVE_ORDERS_PAGE_SIZE,
+        )
+
+    if page_data["orders"]:
+        text, keyboard = render_orders_board(page_data, sort, page)
+    else:
+        page = 0
+        text = "Нет активных заказов."
+        keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data=cb.ADMIN_PANEL())]]
+
+    # Запоминаем отпечаток показанного, чтобы не отправлять лишние правки;
+    # сам текст доски в сохраняемом состоянии пользователя не нужен
+    previous = context.user_data.get("orders_board") or {}
+    rendered = hashlib.blake2b(
+        (text + str([[b.callback_data for b in row] for row in keyboard])).encode(),
+        digest_size=8,
+    ).hexdigest()
+    message_id = query.message.message_id if query.message else None
+    context.user_data["orders_board"] = {
+        "message_id": message_id,
+        "sort": sort,
+        "page": page,
+        "rendered": rendered,
+    }
+    if (
+        previous.get("message_id") == message_id
+        and previous.get("rendered") == rendered
+    ):
+        return
 
     await query.edit_message_text(
-        text, reply_markup=reply_markup, parse_mode="Markdown"
+        text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown"
     )
 
 
-async def complete_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Отметить заказ как выполненный и уведомить пользователя"""
+async def manage_orders(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    sort: str = None,
+    page: int = 0,
+):
+    """Управление заказами"""
     query = update.callback_query
     await query.answer()
 
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
+        await query.edit_message_text("У вас нет доступа к этой функции.")
+        return
+
+    # Без параметров — первая страница с последней выбранной сортировкой
+    if sort is None:
+        sort = (context.user_data.get("orders_board") or {}).get("sort", "desired")
+        # Переход из другого меню — сообщение нужно перерисовать в любом случае
+        context.user_data.pop("orders_board", None)
+
+    await show_orders_board(update, context, sort, page)
+
+
+async def complete_order(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    order_id: int,
+    new_status: OrderStatus,
+):
+    """Перевести заказ в другой статус и уведомить пользователя
+
+    Вызывается кнопками доски и кнопкой «Заказ готов» в уведомлении
+    о новом заказе.
+    """
+    query = update.callback_query
+
+    if not await db.is_admin(query.from_user.id):
+        await query.answer()
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
 
-    order_id = int(query.data.split("_")[-1])
-    db.update_order_status(order_id, "Готов")
+    # Переход проверяется в БД: заказ мог уже изменить другой администратор
+    if await db.update_order_status(order_id, new_status):
+        if new_status == OrderStatus.READY:
+            context.application.create_task(
+                notify_user_order_ready(context, order_id), update=update
+            )
+        elif new_status == OrderStatus.CANCELLED:
+            context.application.create_task(
+                notify_user_order_cancelled(context, order_id), update=update
+            )
+        await query.answer(ORDER_STATUS_CHANGED[new_status].format(order_id))
+    else:
+        await query.answer(
+            f"Заказ #{order_id} нельзя перевести в статус «{new_status.value}»: "
+            "его статус уже изменён.",
+            show_alert=True,
+        )
+
+    board = context.user_data.get("orders_board") or {}
+    if query.message and board.get("message_id") == query.message.message_id:
+        # Нажато на доске — обновляем только её текущую страницу
+        await show_orders_board(update, context, board["sort"], board["page"])
+    else:
+        # Нажато в уведомлении о новом заказе — убираем выполненную кнопку
+        await query.edit_message_reply_markup(
+            reply_markup=InlineKeyboardMarkup(
+                [
+                    [
+                        InlineKeyboardButton(
+                            "📦 Активные заказы", callback_data=cb.ORDERS_BOARD()
+                        )
+                    ]
+                ]
+            )
+        )
 
-    # Отправляем уведомление пользователю
-    await notify_user_order_ready(context, order_id)
 
-    await query.answer("Заказ отмечен как выполненный! Клиент уведомлен.")
-    await manage_orders(update, context)
+def format_unavailable_items(unavailable: list) -> str:
+    """Текст о товарах корзины, которые не удалось заказать"""
+    text = "⚠️ Эти товары больше недоступны и не вошли в заказ:\n"
+    for item in unavailable:
+        text += f"• {item['name'] or 'Товар #' + str(item['item_id'])}\n"
+    return text
 
 
 async def process_order_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -404,19 +828,31 @@ async def process_order_handler(update: Update, context: ContextTypes.DEFAULT_TY
     if not cart_items:
         await query.edit_message_text(
             "Ваша корзина пуста. Добавьте товары для оформления заказа.",
-            reply_markup=InlineKeyboardMarkup(
-                [[InlineKeyboardButton("🔙 В меню", callback_data="menu")]]
-            ),
+            reply_markup=static_keyboard(build_back_to_menu_keyboard),
         )
         return
 
     try:
         # Создаем заказ
-        order_id = db.process_order(query.from_user.id, cart_items)
+        result = await db.process_order(query.from_user.id, cart_items)
+        order_id = result["order_id"]
 
         # Очищаем корзину
         context.user_data["cart"] = []
 
+        if order_id is None:
+            # Пустой список — корзину успели оформить повторным нажатием
+            text = (
+                format_unavailable_items(result["unavailable"])
+                if result["unavailable"]
+                else "Ваша корзина пуста!"
+            )
+            await query.edit_message_text(
+                text,
+                reply_markup=static_keyboard(build_back_to_menu_keyboard),
+            )
+            return
+
         # Формируем сообщение о успешном создании заказа
         text = (
             "✅ *Заказ успешно оформлен!*\n\n"
@@ -425,40 +861,30 @@ async def process_order_handler(update: Update, context: ContextTypes.DEFAULT_TY
             "Мы уведомим вас, когда заказ будет готов!\n"
             "Спасибо, что выбрали нас! 🙏"
         )
+        if result["unavailable"]:
+            text += "\n\n" + format_unavailable_items(result["unavailable"])
 
         await query.edit_message_text(
             text,
             reply_markup=InlineKeyboardMarkup(
-                [
-                    [
-                        InlineKeyboardButton(
-                            "🔙 В главное меню", callback_data="back_to_main"
-                        )
-                    ]
-                ]
+                [[InlineKeyboardButton("🔙 В главное меню", callback_data=cb.MAIN())]]
             ),
             parse_mode="Markdown",
         )
 
-    except Exception as e:
+    except Exception:
         await query.edit_message_text(
             "Произошла ошибка при оформлении заказа. Попробуйте позже.",
             reply_markup=InlineKeyboardMarkup(
-                [
-                    [
-                        InlineKeyboardButton(
-                            "🔙 В главное меню", callback_data="back_to_main"
-                        )
-                    ]
-                ]
+                [[InlineKeyboardButton("🔙 В главное меню", callback_data=cb.MAIN())]]
             ),
         )
-        print(f"Error processing order: {e}")
+        logger.exception("Error processing order")
 
 
 async def notify_user_order_ready(context: ContextTypes.DEFAULT_TYPE, order_id: int):
     """Отправить уведомление пользователю о готовности заказа"""
-    order_info = db.notify_order_status(order_id)
+    order_info = await db.notify_order_status(order_id)
     if not order_info:
         return
 
@@ -475,24 +901,51 @@ async def notify_user_order_ready(context: ContextTypes.DEFAULT_TYPE, order_id:
     text += "Ждём вас! ☕️"
 
     try:
-        await context.bot.send_message(
-            chat_id=order_info["telegram_id"], text=text, parse_mode="Markdown"
+        await notifier.send_message(
+            context.bot, order_info["telegram_id"], text=text, parse_mode="Markdown"
         )
-    except Exception as e:
-        print(f"Error sending notification: {e}")
+        await db.mark_order_notified(order_id)
+    except Exception:
+        logger.exception("Error sending notification", extra={"order_id": order_id})
 
 
-async def add_to_cart(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def notify_user_order_cancelled(
+    context: ContextTypes.DEFAULT_TYPE, order_id: int
+):
+    """Отправить уведомление пользователю об отмене заказа"""
+    order_info = await db.notify_order_status(order_id)
+    if not order_info:
+        return
+
+    text = (
+        "❌ *Ваш заказ отменён*\n\n"
+        f"Номер заказа: #{order_info['order_id']}\n"
+        "Если это ошибка, свяжитесь с нами: @CoffeeNur89"
+    )
+
+    try:
+        await notifier.send_message(
+            context.bot, order_info["telegram_id"], text=text, parse_mode="Markdown"
+        )
+    except Exception:
+        logger.exception("Error sending notification", extra={"order_id": order_id})
+
+
+async def add_to_cart(update: Update, context: ContextTypes.DEFAULT_TYPE, item_id: int):
     """Добавить товар в корзину"""
     query = update.callback_query
     await query.answer()
 
-    item_id = int(query.data.split("_")[-1])
-
-    # Получаем текущее количество из кнопки
-    keyboard = query.message.reply_markup.inline_keyboard
-    quantity_button = keyboard[0][1]  # Кнопка с количеством
-    quantity = int(quantity_button.text)
+    card = get_item_card(context, query.message.message_id, item_id)
+    if card:
+        # Количество могло измениться, а перерисовка карточки ещё не прошла
+        quantity = card["quantity"]
+        context.user_data.pop("item_card")
+    else:
+        # Карточка открыта до перезапуска бота: количество берём из кнопки
+        keyboard = query.message.reply_markup.inline_keyboard
+        quantity_button = keyboard[0][1]  # Кнопка с количеством
+        quantity = int(quantity_button.text)
 
     # Инициализируем корзину, если её нет
     if "cart" not in context.user_data:
@@ -513,8 +966,11 @@ async def add_to_cart(update: Update, context: ContextTypes.DEFAULT_TYPE):
         context.user_data["cart"].append(cart_item)
 
     # Получаем название товара для сообщения
-    item = db.get_menu_item(item_id)
-    item_name = item["name"] if item else "товар"
+    if card:
+        item_name = card["name"]
+    else:
+        item = await db.get_menu_item(item_id)
+        item_name = item["name"] if item else "товар"
 
     await query.edit_message_text(
         f"✅ {item_name} добавлен в корзину",
@@ -522,66 +978,101 @@ async def add_to_cart(update: Update, context: ContextTypes.DEFAULT_TYPE):
             [
                 [
                     InlineKeyboardButton(
-                        "🛒 Перейти в корзину", callback_data="view_cart"
+                        "🛒 Перейти в корзину", callback_data=cb.VIEW_CART()
                     ),
-                    InlineKeyboardButton("🔙 Вернуться в меню", callback_data="menu"),
+                    InlineKeyboardButton("🔙 Вернуться в меню", callback_data=cb.MENU()),
                 ]
             ]
         ),
     )
 
 
-async def update_quantity(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик изменения количества товара"""
+async def update_quantity(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, item_id: int, delta: int
+):
+    """Обработчик изменения количества товара на delta (+1 или -1)
+
+    Количество хранится в карточке товара в user_data. Первое нажатие
+    перерисовывает сообщение сразу; нажатия во время правки и в течение
+    QUANTITY_EDIT_DELAY_MS после неё объединяются в одну правку с итоговым
+    количеством.
+    """
     query = update.callback_query
     await query.answer()
 
-    action, item_id = query.data.split("_")
-    item_id = int(item_id)
-    item = db.get_menu_item(item_id)
-
-    if not item:
-        await query.edit_message_text(
-            "Товар не найден",
-            reply_markup=InlineKeyboardMarkup(
-                [[InlineKeyboardButton("🔙 Назад в меню", callback_data="menu")]]
-            ),
+    message = query.message
+    card = get_item_card(context, message.message_id, item_id)
+    if card is None:
+        # Карточка открыта до перезапуска бота или потеряна вместе с user_data
+        item = await db.get_menu_item(item_id)
+        if not item:
+            await query.edit_message_text(
+                "Товар не найден",
+                reply_markup=InlineKeyboardMarkup(
+                    [[InlineKeyboardButton("🔙 Назад в меню", callback_data=cb.MENU())]]
+                ),
+            )
+            return
+        quantity_button = message.reply_markup.inline_keyboard[0][1]
+        card = open_item_card(
+            context, message.message_id, item, int(quantity_button.text)
         )
-        return
 
-    # Получаем текущее количество из текста кнопки
-    keyboard = query.message.reply_markup.inline_keyboard
-    quantity_button = keyboard[0][1]  # Кнопка с количеством
-    current_quantity = int(quantity_button.text)
+    card["quantity"] = max(1, card["quantity"] + delta)
 
-    # Изменяем количество
-    if action == "increase":
-        new_quantity = current_quantity + 1
-    else:  # decrease
-        new_quantity = max(1, current_quantity - 1)
+    key = (message.chat_id, message.message_id)
+    if key in pending_card_edits:
+        # Идущая перерисовка по окончании паузы покажет новое количество
+        return
+    pending_card_edits.add(key)
+    # Отдельной задачей: обработчик не задерживает следующие нажатия пользователя
+    context.application.create_task(
+        refresh_item_card(context, *key, BotConfig.QUANTITY_EDIT_DELAY_MS / 1000),
+        update=update,
+    )
 
-    # Обновляем клавиатуру
-    keyboard = [
-        [
-            InlineKeyboardButton("➖", callback_data=f"decrease_{item_id}"),
-            InlineKeyboardButton(str(new_quantity), callback_data="quantity"),
-            InlineKeyboardButton("➕", callback_data=f"increase_{item_id}"),
-        ],
-        [
-            InlineKeyboardButton(
-                "🛒 Добавить в корзину", callback_data=f"add_to_cart_{item_id}"
-            )
-        ],
-        [InlineKeyboardButton("🔙 Назад в меню", callback_data="menu")],
-    ]
 
-    await query.edit_message_text(
-        f"✨ *{item['name']}*\n"
-        f"💰 Цена: {item['price']}₽\n\n"
-        "Выберите количество 👇",
-        reply_markup=InlineKeyboardMarkup(keyboard),
+async def refresh_item_card(
+    context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int, pause: float
+):
+    """Перерисовать карточку сразу и повторять через pause секунд, пока
+    количество меняется"""
+    try:
+        while await redraw_item_card(context, chat_id, message_id):
+            await asyncio.sleep(pause)
+    finally:
+        pending_card_edits.discard((chat_id, message_id))
+
+
+async def redraw_item_card(
+    context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int
+) -> bool:
+    """Показать в карточке товара текущее количество; True, если сообщение
+    отредактировано"""
+    # Товар могли добавить в корзину или уйти в меню
+    card = context.user_data.get("item_card")
+    if not card or card["message_id"] != message_id:
+        return False
+    if card["quantity"] == card["shown"]:
+        return False
+
+    quantity = card["quantity"]
+    text, reply_markup = render_item_card(card)
+    await context.bot.edit_message_text(
+        text,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=reply_markup,
         parse_mode="Markdown",
     )
+    # Только после успешной правки: при ошибке следующее нажатие повторит её
+    card["shown"] = quantity
+    return True
+
+
+async def quantity_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Кнопка с количеством товара только показывает число"""
+    await update.callback_query.answer()
 
 
 async def view_cart(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -602,9 +1093,7 @@ async def view_cart(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if not cart_items:
             await message(
                 "Ваша корзина пуста!",
-                reply_markup=InlineKeyboardMarkup(
-                    ((InlineKeyboardButton("🔙 В меню", callback_data="menu"),),)
-                ),
+                reply_markup=static_keyboard(build_back_to_menu_keyboard),
             )
             return
 
@@ -612,7 +1101,7 @@ async def view_cart(update: Update, context: ContextTypes.DEFAULT_TYPE):
         total = 0
 
         for item in cart_items:
-            menu_item = db.get_menu_item(item["item_id"])
+            menu_item = await db.get_menu_item(item["item_id"])
             if menu_item:
                 subtotal = menu_item["price"] * item["quantity"]
                 total += subtotal
@@ -623,25 +1112,19 @@ async def view_cart(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         text += f"\n*Итого: {total}₽*"
 
-        keyboard = (
-            (InlineKeyboardButton("✅ Оформить заказ", callback_data="confirm_order"),),
-            (InlineKeyboardButton("🗑 Очистить корзину", callback_data="clear_cart"),),
-            (InlineKeyboardButton("🔙 В меню", callback_data="menu"),),
-        )
-
         await message(
-            text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown"
+            text,
+            reply_markup=static_keyboard(build_cart_keyboard),
+            parse_mode="Markdown",
         )
-    except Exception as e:
+    except Exception:
         # Если произошла ошибка, отправляем новое сообщение
         if update.callback_query:
             await update.callback_query.message.reply_text(
                 "Произошла ошибка. Попробуйте снова.",
-                reply_markup=InlineKeyboardMarkup(
-                    ((InlineKeyboardButton("🔙 В меню", callback_data="menu"),),)
-                ),
+                reply_markup=static_keyboard(build_back_to_menu_keyboard),
             )
-        print(f"Error in view_cart: {e}")
+        logger.exception("Error in view_cart")
 
 
 async def clear_cart(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -652,9 +1135,7 @@ async def clear_cart(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data["cart"] = []
     await query.edit_message_text(
         "Корзина очищена!",
-        reply_markup=InlineKeyboardMarkup(
-            [[InlineKeyboardButton("🔙 В меню", callback_data="menu")]]
-        ),
+        reply_markup=static_keyboard(build_back_to_menu_keyboard),
     )
 
 
@@ -667,31 +1148,22 @@ async def confirm_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not cart_items:
         await query.edit_message_text(
             "Ваша корзина пуста!",
-            reply_markup=InlineKeyboardMarkup(
-                ((InlineKeyboardButton("🔙 В меню", callback_data="menu"),),)
-            ),
+            reply_markup=static_keyboard(build_back_to_menu_keyboard),
         )
         return
 
     # Показываем варианты времени
-    keyboard = (
-        (InlineKeyboardButton("⚡️ Как можно быстрее", callback_data="time_asap"),),
-        (InlineKeyboardButton("⏰ Через 15 минут", callback_data="time_15"),),
-        (InlineKeyboardButton("⏰ Через 30 минут", callback_data="time_30"),),
-        (InlineKeyboardButton("⏰ Через 45 минут", callback_data="time_45"),),
-        (InlineKeyboardButton("⏰ Через 1 час", callback_data="time_60"),),
-        (InlineKeyboardButton("🔙 Назад", callback_data="view_cart"),),
-    )
-
     await query.edit_message_text(
-        "🕒 *Выберите желаемое время получения заказа:*",
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        ORDER_TIME_TEXT,
+        reply_markup=static_keyboard(build_order_time_keyboard),
         parse_mode="Markdown",
     )
 
 
-async def handle_order_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик выбора времени заказа"""
+async def handle_order_time(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, minutes: int
+):
+    """Обработчик выбора времени заказа (minutes = 0 — как можно быстрее)"""
     try:
         query = update.callback_query
         try:
@@ -699,37 +1171,66 @@ async def handle_order_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
         except Exception:
             pass
 
-        time_option = query.data.split("_")[1]
+        # Повторное нажатие после оформления заказа: корзина уже очищена
+        if not context.user_data.get("cart"):
+            await query.edit_message_text(
+                "Ваша корзина пуста!",
+                reply_markup=static_keyboard(build_back_to_menu_keyboard),
+            )
+            return
 
         # Сохраняем выбранное время
-        if time_option == "asap":
-            time_text = "Как можно быстрее"
-        else:
-            minutes = int(time_option)
+        if minutes:
             time_text = f"Через {minutes} минут"
+        else:
+            time_text = "Как можно быстрее"
+            minutes = None
 
         try:
             # Создаем заказ с выбранным временем
-            order_id = db.process_order(
-                query.from_user.id, context.user_data["cart"], desired_time=time_text
+            result = await db.process_order(
+                query.from_user.id,
+                context.user_data["cart"],
+                desired_time=time_text,
+                ready_in_minutes=minutes,
             )
+            order_id = result["order_id"]
 
             # Очищаем корзину
             context.user_data["cart"] = []
 
-            # Уведомляем пользователя
-            await query.edit_message_text(
+            if order_id is None:
+                # Пустой список — корзину успели оформить повторным нажатием
+                text = (
+                    format_unavailable_items(result["unavailable"])
+                    if result["unavailable"]
+                    else "Ваша корзина пуста!"
+                )
+                await query.edit_message_text(
+                    text,
+                    reply_markup=static_keyboard(build_back_to_menu_keyboard),
+                )
+                return
+
+            text = (
                 "✅ *Заказ успешно оформлен!*\n\n"
                 f"Номер заказа: #{order_id}\n"
                 f"Время получения: {time_text}\n"
                 "Статус: Принят\n\n"
                 "Мы уведомим вас, когда заказ будет готов.\n"
-                "Спасибо за заказ! ☕️",
+                "Спасибо за заказ! ☕️"
+            )
+            if result["unavailable"]:
+                text += "\n\n" + format_unavailable_items(result["unavailable"])
+
+            # Уведомляем пользователя
+            await query.edit_message_text(
+                text,
                 reply_markup=InlineKeyboardMarkup(
                     (
                         (
                             InlineKeyboardButton(
-                                "🔙 В главное меню", callback_data="back_to_main"
+                                "🔙 В главное меню", callback_data=cb.MAIN()
                             ),
                         ),
                     )
@@ -737,26 +1238,28 @@ async def handle_order_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 parse_mode="Markdown",
             )
 
-            # Уведомляем всех админов о новом заказе
-            await notify_admins_new_order(context, order_id)
+            # Уведомляем всех админов о новом заказе, не задерживая ответ клиенту
+            context.application.create_task(
+                notify_admins_new_order(context, order_id), update=update
+            )
 
-        except Exception as e:
-            print(f"Error processing order: {e}")
+        except Exception:
+            logger.exception("Error processing order")
             await query.edit_message_text(
                 "Произошла ошибка при оформлении заказа. Попробуйте позже.",
                 reply_markup=InlineKeyboardMarkup(
                     (
                         (
                             InlineKeyboardButton(
-                                "🔙 В главное меню", callback_data="back_to_main"
+                                "🔙 В главное меню", callback_data=cb.MAIN()
                             ),
                         ),
                     )
                 ),
             )
 
-    except Exception as e:
-        print(f"Error in handle_order_time: {e}")
+    except Exception:
+        logger.exception("Error in handle_order_time")
         try:
             await update.callback_query.message.reply_text(
                 "Произошла ошибка. Попробуйте оформить заказ заново.",
@@ -764,7 +1267,7 @@ async def handle_order_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     (
                         (
                             InlineKeyboardButton(
-                                "🔙 В корзину", callback_data="view_cart"
+                                "🔙 В корзину", callback_data=cb.VIEW_CART()
                             ),
                         ),
                     )
@@ -776,11 +1279,11 @@ async def handle_order_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def notify_admins_new_order(context: ContextTypes.DEFAULT_TYPE, order_id: int):
     """Уведомить всех админов о новом заказе"""
-    order_info = db.notify_order_status(order_id)
+    order_info = await db.notify_order_status(order_id)
     if not order_info:
         return
 
-    admins = db.get_all_admins()
+    admins = await db.get_all_admins()
 
     text = (
         "🆕 *Новый заказ!*\n\n"
@@ -798,21 +1301,27 @@ async def notify_admins_new_order(context: ContextTypes.DEFAULT_TYPE, order_id:
     keyboard = (
         (
             InlineKeyboardButton(
-                "✅ Заказ готов", callback_data=f"complete_order_{order_id}"
+                "✅ Заказ готов",
+                callback_data=cb.SET_ORDER_STATUS(order_id, OrderStatus.READY),
             ),
         ),
     )
 
-    for admin_id in admins:
-        try:
-            await context.bot.send_message(
-                chat_id=admin_id,
-                text=text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
-                parse_mode="Markdown",
+    # Рассылаем всем админам параллельно с учётом лимитов Telegram
+    results = await notifier.broadcast(
+        context.bot,
+        admins,
+        text=text,
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode="Markdown",
+    )
+    for admin_id, result in zip(admins, results):
+        if isinstance(result, Exception):
+            logger.warning(
+                "Error sending notification to admin",
+                extra={"admin_id": admin_id, "order_id": order_id},
+                exc_info=result,
             )
-        except Exception as e:
-            print(f"Error sending notification to admin {admin_id}: {e}")
 
 
 async def admin_menu_management(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -820,14 +1329,14 @@ async def admin_menu_management(update: Update, context: ContextTypes.DEFAULT_TY
     query = update.callback_query
     await query.answer()
 
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
 
     keyboard = [
-        [InlineKeyboardButton("➕ Добавить товар", callback_data="start_add_item")],
-        [InlineKeyboardButton("📋 Список товаров", callback_data="list_menu_items")],
-        [InlineKeyboardButton("🔙 Назад", callback_data="admin_panel")],
+        [InlineKeyboardButton("➕ Добавить товар", callback_data=cb.START_ADD_ITEM())],
+        [InlineKeyboardButton("📋 Список товаров", callback_data=cb.LIST_MENU_ITEMS())],
+        [InlineKeyboardButton("🔙 Назад", callback_data=cb.ADMIN_PANEL())],
     ]
 
     await query.edit_message_text(
@@ -837,92 +1346,102 @@ async def admin_menu_management(update: Update, context: ContextTypes.DEFAULT_TY
     )
 
 
-async def handle_menu_management(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик действий с меню"""
+async def start_add_menu_item(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Начать добавление товара в меню"""
     query = update.callback_query
     await query.answer()
 
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
 
-    action = query.data
+    context.user_data["menu_action"] = "adding_name"
+    await query.edit_message_text(
+        "Введите название нового товара:\n" "(для отмены нажмите кнопку ниже)",
+        reply_markup=InlineKeyboardMarkup(
+            [[InlineKeyboardButton("🔙 Отмена", callback_data=cb.MENU_MANAGEMENT())]]
+        ),
+    )
+
+
+async def list_menu_items(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Список товаров меню с кнопками удаления"""
+    query = update.callback_query
+    await query.answer()
+
+    if not await db.is_admin(query.from_user.id):
+        await query.edit_message_text("У вас нет доступа к этой функции.")
+        return
 
-    if action == "start_add_item":
-        context.user_data["menu_action"] = "adding_name"
+    menu_items = await db.get_menu_items()
+    if not menu_items:
         await query.edit_message_text(
-            "Введите название нового товара:\n" "(для отмены нажмите кнопку ниже)",
+            "Меню пусто. Добавьте товары!",
             reply_markup=InlineKeyboardMarkup(
-                [[InlineKeyboardButton("🔙 Отмена", callback_data="menu_management")]]
+                [[InlineKeyboardButton("🔙 Назад", callback_data=cb.MENU_MANAGEMENT())]]
             ),
         )
+        return
 
-    elif action == "list_menu_items":
-        menu_items = db.get_menu_items()
-        if not menu_items:
-            await query.edit_message_text(
-                "Меню пусто. Добавьте товары!",
-                reply_markup=InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                "🔙 Назад", callback_data="menu_management"
-                            )
-                        ]
-                    ]
-                ),
-            )
-            return
-
-        text = "*Список товаров в меню:*\n\n"
-        keyboard = []
-        for item in menu_items:
-            text += f"• {item['name']} - {item['price']}₽\n"
-            keyboard.append(
-                [
-                    InlineKeyboardButton(
-                        f"❌ Удалить {item['name']}",
-                        callback_data=f"delete_item_{item['id']}",
-                    )
-                ]
-            )
-
+    text = "*Список товаров в меню:*\n\n"
+    keyboard = []
+    for item in menu_items:
+        text += f"• {item['name']} - {item['price']}₽\n"
         keyboard.append(
-            [InlineKeyboardButton("🔙 Назад", callback_data="menu_management")]
+            [
+                InlineKeyboardButton(
+                    f"❌ Удалить {item['name']}",
+                    callback_data=cb.DELETE_ITEM(item["id"]),
+                )
+            ]
         )
 
-        await query.edit_message_text(
-            text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown"
-        )
+    keyboard.append(
+        [InlineKeyboardButton("🔙 Назад", callback_data=cb.MENU_MANAGEMENT())]
+    )
 
-    elif action.startswith("delete_item_"):
-        item_id = int(action.split("_")[-1])
-        if db.delete_menu_item(item_id):
-            await query.edit_message_text(
-                "✅ Товар успешно удален",
-                reply_markup=InlineKeyboardMarkup(
+    await query.edit_message_text(
+        text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown"
+    )
+
+
+async def delete_menu_item(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, item_id: int
+):
+    """Удалить товар из меню"""
+    query = update.callback_query
+    await query.answer()
+
+    if not await db.is_admin(query.from_user.id):
+        await query.edit_message_text("У вас нет доступа к этой функции.")
+        return
+
+    if await db.delete_menu_item(item_id):
+        await query.edit_message_text(
+            "✅ Товар успешно удален",
+            reply_markup=InlineKeyboardMarkup(
+                [
                     [
-                        [
-                            InlineKeyboardButton(
-                                "🔙 К списку товаров", callback_data="list_menu_items"
-                            )
-                        ]
+                        InlineKeyboardButton(
+                            "🔙 К списку товаров", callback_data=cb.LIST_MENU_ITEMS()
+                        )
                     ]
-                ),
-            )
-        else:
-            await query.edit_message_text(
-                "❌ Ошибка при удалении товара",
-                reply_markup=InlineKeyboardMarkup(
+                ]
+            ),
+        )
+    else:
+        await query.edit_message_text(
+            "❌ Ошибка при удалении товара",
+            reply_markup=InlineKeyboardMarkup(
+                [
                     [
-                        [
-                            InlineKeyboardButton(
-                                "🔙 К списку товаров", callback_data="list_menu_items"
-                            )
-                        ]
+                        InlineKeyboardButton(
+                            "🔙 К списку товаров", callback_data=cb.LIST_MENU_ITEMS()
+                        )
                     ]
-                ),
-            )
+                ]
+            ),
+        )
 
 
 async def handle_menu_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -930,7 +1449,7 @@ async def handle_menu_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if "menu_action" not in context.user_data:
         return
 
-    if not db.is_admin(update.effective_user.id):
+    if not await db.is_admin(update.effective_user.id):
         return
 
     action = context.user_data["menu_action"]
@@ -942,7 +1461,7 @@ async def handle_menu_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(
             "Введите цену товара (только число):",
             reply_markup=InlineKeyboardMarkup(
-                [[InlineKeyboardButton("🔙 Отмена", callback_data="menu_management")]]
+                [[InlineKeyboardButton("🔙 Отмена", callback_data=cb.MENU_MANAGEMENT())]]
             ),
         )
 
@@ -953,7 +1472,7 @@ async def handle_menu_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 raise ValueError
 
             # Создаем новый товар
-            db.add_menu_item(name=context.user_data["new_item_name"], price=price)
+            await db.add_menu_item(name=context.user_data["new_item_name"], price=price)
 
             # Очищаем данные
             context.user_data.clear()
@@ -964,7 +1483,8 @@ async def handle_menu_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     [
                         [
                             InlineKeyboardButton(
-                                "🔙 В управление меню", callback_data="menu_management"
+                                "🔙 В управление меню",
+                                callback_data=cb.MENU_MANAGEMENT(),
                             )
                         ]
                     ]
@@ -977,7 +1497,7 @@ async def handle_menu_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     [
                         [
                             InlineKeyboardButton(
-                                "🔙 Отмена", callback_data="menu_management"
+                                "🔙 Отмена", callback_data=cb.MENU_MANAGEMENT()
                             )
                         ]
                     ]
@@ -990,18 +1510,22 @@ async def admin_management(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
 
     keyboard = [
-        [InlineKeyboardButton("➕ Добавить администратора", callback_data="add_admin")],
         [
             InlineKeyboardButton(
-                "➖ Удалить администратора", callback_data="remove_admin"
+                "➕ Добавить администратора", callback_data=cb.START_ADD_ADMIN()
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                "➖ Удалить администратора", callback_data=cb.LIST_ADMINS()
             )
         ],
-        [InlineKeyboardButton("🔙 Назад", callback_data="admin_panel")],
+        [InlineKeyboardButton("🔙 Назад", callback_data=cb.ADMIN_PANEL())],
     ]
 
     await query.edit_message_text(
@@ -1011,92 +1535,92 @@ async def admin_management(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def handle_admin_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик действий с администраторами"""
+async def start_add_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Начать добавление администратора"""
+    query = update.callback_query
+    await query.answer()
+
+    if not await db.is_admin(query.from_user.id):
+        await query.edit_message_text("У вас нет доступа к этой функции.")
+        return
+
+    context.user_data["admin_action"] = "adding_admin"
+    await query.edit_message_text(
+        "Отправьте Telegram ID пользователя, которого хотите сделать администратором:\n\n"
+        "(для отмены нажмите кнопку ниже)",
+        reply_markup=InlineKeyboardMarkup(
+            [[InlineKeyboardButton("🔙 Отмена", callback_data=cb.ADMIN_MANAGEMENT())]]
+        ),
+    )
+
+
+async def list_admins_for_removal(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Список администраторов с кнопками удаления"""
     query = update.callback_query
     await query.answer()
 
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
 
-    action = query.data
+    # Получаем список всех администраторов
+    admins = await db.get_all_admins()
 
-    if action == "add_admin":
-        context.user_data["admin_action"] = "adding_admin"
+    if not admins:
         await query.edit_message_text(
-            "Отправьте Telegram ID пользователя, которого хотите сделать администратором:\n\n"
-            "(для отмены нажмите кнопку ниже)",
+            "Список администраторов пуст.",
             reply_markup=InlineKeyboardMarkup(
-                [[InlineKeyboardButton("🔙 Отмена", callback_data="admin_management")]]
+                [[InlineKeyboardButton("🔙 Назад", callback_data=cb.ADMIN_MANAGEMENT())]]
             ),
         )
+        return
 
-    elif action == "remove_admin":
-        # Получаем список всех администраторов
-        admins = db.get_all_admins()
-
-        if not admins:
-            await query.edit_message_text(
-                "Список администраторов пуст.",
-                reply_markup=InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                "🔙 Назад", callback_data="admin_management"
-                            )
-                        ]
-                    ]
-                ),
+    keyboard = []
+    for admin_id in admins:
+        # Не показываем кнопку удаления для текущего админа
+        if admin_id != query.from_user.id:
+            keyboard.append(
+                [
+                    InlineKeyboardButton(
+                        f"❌ Удалить админа ID: {admin_id}",
+                        callback_data=cb.REMOVE_ADMIN(admin_id),
+                    )
+                ]
             )
-            return
-
-        keyboard = []
-        for admin_id in admins:
-            # Не показываем кнопку удаления для текущего админа
-            if admin_id != query.from_user.id:
-                keyboard.append(
-                    [
-                        InlineKeyboardButton(
-                            f"❌ Удалить админа ID: {admin_id}",
-                            callback_data=f"remove_admin_{admin_id}",
-                        )
-                    ]
-                )
 
-        keyboard.append(
-            [InlineKeyboardButton("🔙 Назад", callback_data="admin_management")]
-        )
+    keyboard.append(
+        [InlineKeyboardButton("🔙 Назад", callback_data=cb.ADMIN_MANAGEMENT())]
+    )
 
-        await query.edit_message_text(
-            "Выберите администратора для удаления:",
-            reply_markup=InlineKeyboardMarkup(keyboard),
-        )
+    await query.edit_message_text(
+        "Выберите администратора для удаления:",
+        reply_markup=InlineKeyboardMarkup(keyboard),
+    )
 
 
-async def handle_remove_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_remove_admin(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, target_id: int
+):
     """Обработчик удаления администратора через кнопку"""
     query = update.callback_query
     await query.answer()
 
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
 
-    target_id = int(query.data.split("_")[-1])
-
-    if db.remove_admin(query.from_user.id, target_id):
+    if await db.remove_admin(query.from_user.id, target_id):
         await query.edit_message_text(
             "✅ Администратор успешно удален!",
             reply_markup=InlineKeyboardMarkup(
-                [[InlineKeyboardButton("🔙 Назад", callback_data="admin_management")]]
+                [[InlineKeyboardButton("🔙 Назад", callback_data=cb.ADMIN_MANAGEMENT())]]
             ),
         )
     else:
         await query.edit_message_text(
             "❌ Ошибка при удалении администратора.",
             reply_markup=InlineKeyboardMarkup(
-                [[InlineKeyboardButton("🔙 Назад", callback_data="admin_management")]]
+                [[InlineKeyboardButton("🔙 Назад", callback_data=cb.ADMIN_MANAGEMENT())]]
             ),
         )
 
@@ -1111,7 +1635,7 @@ async def handle_admin_management_input(
     if "admin_action" not in context.user_data:
         return
 
-    if not db.is_admin(update.effective_user.id):
+    if not await db.is_admin(update.effective_user.id):
         return
 
     action = context.user_data["admin_action"]
@@ -1130,7 +1654,7 @@ async def handle_admin_management_input(
                     [
                         [
                             InlineKeyboardButton(
-                                "🔙 Отмена", callback_data="admin_management"
+                                "🔙 Отмена", callback_data=cb.ADMIN_MANAGEMENT()
                             )
                         ]
                     ]
@@ -1141,21 +1665,27 @@ async def handle_admin_management_input(
         await update.message.reply_text(
             "❌ Пожалуйста, перешлите сообщение от пользователя или отправьте его Telegram ID.",
             reply_markup=InlineKeyboardMarkup(
-                [[InlineKeyboardButton("🔙 Отмена", callback_data="admin_management")]]
+                [
+                    [
+                        InlineKeyboardButton(
+                            "🔙 Отмена", callback_data=cb.ADMIN_MANAGEMENT()
+                        )
+                    ]
+                ]
             ),
         )
         return
 
     if action == "adding_admin":
         # Проверяем, не является ли пользователь уже админом
-        if db.is_admin(target_id):
+        if await db.is_admin(target_id):
             await update.message.reply_text(
                 "❌ Этот пользователь уже является администратором!",
                 reply_markup=InlineKeyboardMarkup(
                     [
                         [
                             InlineKeyboardButton(
-                                "🔙 Назад", callback_data="admin_management"
+                                "🔙 Назад", callback_data=cb.ADMIN_MANAGEMENT()
                             )
                         ]
                     ]
@@ -1163,14 +1693,14 @@ async def handle_admin_management_input(
             )
             return
 
-        if db.add_admin(update.effective_user.id, target_id):
+        if await db.add_admin(update.effective_user.id, target_id):
             await update.message.reply_text(
                 "✅ Администратор успешно добавлен!",
                 reply_markup=InlineKeyboardMarkup(
                     [
                         [
                             InlineKeyboardButton(
-                                "🔙 Назад", callback_data="admin_management"
+                                "🔙 Назад", callback_data=cb.ADMIN_MANAGEMENT()
                             )
                         ]
                     ]
@@ -1183,7 +1713,7 @@ async def handle_admin_management_input(
                     [
                         [
                             InlineKeyboardButton(
-                                "🔙 Назад", callback_data="admin_management"
+                                "🔙 Назад", callback_data=cb.ADMIN_MANAGEMENT()
                             )
                         ]
                     ]
@@ -1193,80 +1723,125 @@ async def handle_admin_management_input(
     context.user_data.clear()
 
 
-def main():
-    """Основная функция запуска бота"""
-    # Получение токена из переменных окружения
-    token = os.getenv("BOT_TOKEN")
-    if not token:
-        raise ValueError("BOT_TOKEN not found in environment variables")
+async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
+    """Записать в журнал необработанное исключение с данными обновления"""
+    logger.error(
+        "Unhandled error while processing update",
+        extra=update_log_fields(update),
+        exc_info=context.error,
+    )
 
-    # Создание и настройка приложения
-    application = Application.builder().token(token).build()
 
-    # Добавление обработчиков команд
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("menu", menu_handler))
-    application.add_handler(CommandHandler("orders", orders_handler))
-    application.add_handler(CommandHandler("about", about_handler))
+async def post_init(application: Application):
+    """Подготовка к приёму обновлений: БД, схема и кэши
 
-    # Добавление обработчиков для кнопок основного меню
-    application.add_handler(CallbackQueryHandler(menu_handler, pattern="^menu$"))
-    application.add_handler(CallbackQueryHandler(orders_handler, pattern="^my_orders$"))
-    application.add_handler(CallbackQueryHandler(about_handler, pattern="^about$"))
-    application.add_handler(
-        CallbackQueryHandler(back_to_main, pattern="^back_to_main$")
-    )
-    application.add_handler(CallbackQueryHandler(handle_order, pattern="^order_"))
+    Вызывается после Application.initialize(), то есть после запроса getMe
+    и загрузки persistence.
+    """
+    startup.mark("initialize")
 
-    # Добавляем обработчики для корзины и заказов
-    application.add_handler(CallbackQueryHandler(add_to_cart, pattern="^add_to_cart_"))
-    application.add_handler(
-        CallbackQueryHandler(update_quantity, pattern="^(increase|decrease)_")
-    )
-    application.add_handler(CallbackQueryHandler(view_cart, pattern="^view_cart$"))
-    application.add_handler(CallbackQueryHandler(clear_cart, pattern="^clear_cart$"))
-    application.add_handler(
-        CallbackQueryHandler(confirm_order, pattern="^confirm_order$")
-    )
+    await db.ping()
+    startup.mark("db_connect")
 
-    # Добавляем обработчик выбора времени (перемещен выше)
-    application.add_handler(
-        CallbackQueryHandler(handle_order_time, pattern="^time_(asap|15|30|45|60)$")
-    )
+    if DatabaseConfig.DB_CREATE_TABLES:
+        await db.create_tables()
+        startup.mark("create_tables")
 
-    # Добавляем обработчики для админ-панели
-    application.add_handler(CallbackQueryHandler(admin_panel, pattern="^admin_panel$"))
-    application.add_handler(CallbackQueryHandler(admin_stats, pattern="^admin_stats$"))
-    application.add_handler(
-        CallbackQueryHandler(manage_orders, pattern="^manage_orders$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(complete_order, pattern="^complete_order_")
-    )
+    # Первые нажатия после перезапуска не должны ждать загрузки кэшей
+    await asyncio.gather(db.get_menu_items(), db.get_all_admins())
+    startup.mark("cache_warmup")
+    startup.report()
 
-    # Добавляем обработчики для управления меню
-    application.add_handler(
-        CallbackQueryHandler(admin_menu_management, pattern="^menu_management$")
+
+async def shutdown(application: Application):
+    """Освобождение ресурсов при остановке бота"""
+    db.close()
+
+
+def build_application(token: str, base_url: str = None) -> Application:
+    """Создать Application со всеми обработчиками, не запуская его
+
+    base_url — адрес Bot API вместо https://api.telegram.org/bot (нужен
+    нагрузочному тесту с локальным фейковым сервером Telegram).
+    """
+    builder = (
+        Application.builder()
+        .token(token)
+        # Запросы к Bot API с записью времени и ошибок
+        .request(InstrumentedHTTPXRequest(connection_pool_size=256))
+        .get_updates_request(InstrumentedHTTPXRequest())
+        .post_init(post_init)
+        .post_shutdown(shutdown)
+        # Параллельная обработка с сохранением порядка для каждого пользователя
+        .concurrent_updates(PerUserUpdateProcessor(BotConfig.BOT_CONCURRENT_UPDATES))
     )
-    application.add_handler(
-        CallbackQueryHandler(
-            handle_menu_management,
-            pattern="^(start_add_item|list_menu_items|delete_item_)",
+    if PersistenceConfig.PERSISTENCE_ENABLED:
+        # Корзины и состояние диалогов переживают перезапуск бота
+        builder.persistence(
+            DatabasePersistence(
+                db,
+                update_interval=PersistenceConfig.PERSISTENCE_UPDATE_INTERVAL,
+                refresh_on_update=PersistenceConfig.PERSISTENCE_REFRESH_ON_UPDATE,
+                state_ttl_days=PersistenceConfig.PERSISTENCE_STATE_TTL_DAYS,
+            )
         )
-    )
-    application.add_handler(
-        MessageHandler(filters.TEXT & ~filters.COMMAND, handle_menu_text), group=1
-    )
+    if BotConfig.BOT_MODE == "webhook":
+        # Обновления принимает наш HTTP-сервер, Updater не нужен
+        builder.updater(None)
+    if base_url:
+        builder.base_url(base_url)
+    application = builder.build()
 
-    # Добавляем обработчики для управления администраторами
-    application.add_handler(
-        CallbackQueryHandler(admin_management, pattern="^admin_management$")
-    )
-    application.add_handler(
-        CallbackQueryHandler(handle_admin_action, pattern="^(add_admin|remove_admin)$")
-    )
+    # Добавление обработчиков команд
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("menu", menu_handler))
+    application.add_handler(CommandHandler("orders", orders_handler))
+    application.add_handler(CommandHandler("about", about_handler))
+
+    # Все нажатия кнопок разбирает один маршрутизатор (callbacks.py)
+    router = CallbackRouter()
+
+    # Кнопки основного меню
+    router.add(cb.MENU, menu_handler)
+    router.add(cb.MY_ORDERS, orders_handler)
+    router.add(cb.MY_ORDERS_PAGE, orders_handler)
+    router.add(cb.ABOUT, about_handler)
+    router.add(cb.MAIN, back_to_main)
+    router.add(cb.ITEM, handle_order)
+
+    # Корзина и заказы
+    router.add(cb.ADD_TO_CART, add_to_cart)
+    router.add(cb.QUANTITY, update_quantity)
+    router.add(cb.QUANTITY_VALUE, quantity_value)
+    router.add(cb.VIEW_CART, view_cart)
+    router.add(cb.CLEAR_CART, clear_cart)
+    router.add(cb.CONFIRM_ORDER, confirm_order)
+    router.add(cb.ORDER_TIME, handle_order_time)
+
+    # Админ-панель и заказы
+    router.add(cb.ADMIN_PANEL, admin_panel)
+    router.add(cb.ADMIN_STATS, admin_stats)
+    router.add(cb.ORDERS_BOARD, manage_orders)
+    router.add(cb.ORDERS_BOARD_PAGE, manage_orders)
+    router.add(cb.SET_ORDER_STATUS, complete_order)
+
+    # Управление меню
+    router.add(cb.MENU_MANAGEMENT, admin_menu_management)
+    router.add(cb.START_ADD_ITEM, start_add_menu_item)
+    router.add(cb.LIST_MENU_ITEMS, list_menu_items)
+    router.add(cb.DELETE_ITEM, delete_menu_item)
+
+    # Управление администраторами
+    router.add(cb.ADMIN_MANAGEMENT, admin_management)
+    router.add(cb.START_ADD_ADMIN, start_add_admin)
+    router.add(cb.LIST_ADMINS, list_admins_for_removal)
+    router.add(cb.REMOVE_ADMIN, handle_remove_admin)
+
+    application.add_handler(router.handler())
+
+    # Текстовые сообщения при работе с меню и администраторами
     application.add_handler(
-        CallbackQueryHandler(handle_remove_admin, pattern="^remove_admin_[0-9]+$")
+        MessageHandler(filters.TEXT & ~filters.COMMAND, handle_menu_text), group=1
     )
     application.add_handler(
         MessageHandler(
@@ -1276,8 +1851,56 @@ def main():
         group=0,
     )
 
+    application.add_error_handler(error_handler)
+
+    # Метрики, журнал и спаны обработчиков
+    instrument_handlers(application)
+    return application
+
+
+def main():
+    """Основная функция запуска бота"""
+    setup_logging(LoggingConfig.LOG_LEVEL, LoggingConfig.LOG_FORMAT)
+    if LoggingConfig.TRACING_ENABLED:
+        enable_tracing()
+    startup.mark("imports")
+
+    # Получение токена из переменных окружения
+    token = os.getenv("BOT_TOKEN")
+    if not token:
+        raise ValueError("BOT_TOKEN not found in environment variables")
+
+    # Создание и настройка приложения
+    application = build_application(token)
+    startup.mark("build")
+
+    # HTTP-сервер метрик для Prometheus
+    if MetricsConfig.METRICS_PORT:
+        start_metrics_server(
+            application,
+            MetricsConfig.METRICS_PORT,
+            MetricsConfig.METRICS_LISTEN,
+            pool_stats=db.peek_pool_stats,
+        )
+        startup.mark("metrics_server")
+
     # Запуск бота
-    application.run_polling()
+    if BotConfig.BOT_MODE == "webhook":
+        from webhook import run_webhook
+
+        asyncio.run(
+            run_webhook(
+                application,
+                listen=BotConfig.WEBHOOK_LISTEN,
+                port=BotConfig.WEBHOOK_PORT,
+                url_path=BotConfig.WEBHOOK_PATH,
+                webhook_url=BotConfig.WEBHOOK_URL,
+                secret_token=BotConfig.WEBHOOK_SECRET_TOKEN,
+                max_connections=BotConfig.WEBHOOK_MAX_CONNECTIONS,
+            )
+        )
+    else:
+        application.run_polling()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+import select
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+# Базовый кэш с ленивой загрузкой, TTL и инвалидацией
+class LoadingCache:
+    """Загружает данные через loader при первом обращении, после
+    инвалидации и по истечении ttl секунд (0 или None — без ограничения).
+
+    Наследники реализуют _store(data), раскладывая загруженные данные
+    по своим структурам.
+    """
+
+    def __init__(self, ttl: float = None):
+        self.ttl = ttl
+        # Растёт при каждой загрузке и инвалидации
+        self.version = 0
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _is_fresh(self) -> bool:
+        if not self._loaded:
+            return False
+        return not self.ttl or time.monotonic() - self._loaded_at < self.ttl
+
+    def _store(self, data) -> None:
+        raise NotImplementedError
+
+    def _ensure_loaded(self, loader) -> None:
+        if self._is_fresh():
+            return
+        # Одновременные промахи загружают данные только один раз
+        with self._load_lock:
+            if self._is_fresh():
+                return
+            generation = self._generation
+            data = loader()
+            with self._lock:
+                self._store(data)
+                # Инвалидация во время загрузки: данные могут быть устаревшими
+                self._loaded = generation == self._generation
+                self._loaded_at = time.monotonic()
+                self.version += 1
+
+    def invalidate(self) -> None:
+        """Сбросить кэш; следующее обращение загрузит данные заново"""
+        with self._lock:
+            self._loaded = False
+            self._generation += 1
+            # Экраны, построенные по прежним данным, больше не подходят
+            self.version += 1
+
+
+# Кэш меню в памяти процесса
+class MenuCache(LoadingCache):
+    """Хранит меню целиком: словарь товаров по ID и упорядоченный список
+    доступных товаров.
+
+    Возвращаемые словари товаров общие для всех вызывающих и не должны
+    изменяться.
+    """
+
+    def __init__(self, ttl: float = None):
+        super().__init__(ttl)
+        self._items = {}
+        self._available = []
+
+    def _store(self, items) -> None:
+        self._items = {item["id"]: item for item in items}
+        self._available = [item for item in items if item["is_available"]]
+
+    def get_available(self, loader) -> list:
+        """Доступные товары (загружает меню через loader при промахе)"""
+        self._ensure_loaded(loader)
+        return list(self._available)
+
+    def get_item(self, item_id: int, loader):
+        """Товар по ID, включая недоступные (None, если не найден)"""
+        self._ensure_loaded(loader)
+        return self._items.get(item_id)
+
+    def peek_available(self):
+        """Доступные товары без обращения к БД (None при промахе)"""
+        with self._lock:
+            if not self._is_fresh():
+                return None
+            return list(self._available)
+
+    def peek_item(self, item_id: int):
+        """Товар без обращения к БД: (найден ли кэш, товар или None)"""
+        with self._lock:
+            if not self._is_fresh():
+                return False, None
+            return True, self._items.get(item_id)
+
+
+# Кэш множества администраторов
+class AdminCache(LoadingCache):
+    """Хранит Telegram ID всех администраторов, чтобы проверка роли была
+    проверкой принадлежности множеству, а не запросом к БД."""
+
+    def __init__(self, ttl: float = None):
+        super().__init__(ttl)
+        self._admins = frozenset()
+        self._ordered = []
+
+    def _store(self, admin_ids) -> None:
+        self._ordered = list(admin_ids)
+        self._admins = frozenset(admin_ids)
+
+    def get_admins(self, loader) -> list:
+        """Список администраторов (загружает через loader при промахе)"""
+        self._ensure_loaded(loader)
+        return list(self._ordered)
+
+    def contains(self, telegram_id, loader) -> bool:
+        """Является ли пользователь администратором"""
+        self._ensure_loaded(loader)
+        return telegram_id in self._admins
+
+    def peek_contains(self, telegram_id):
+        """Проверка без обращения к БД (None при промахе)"""
+        with self._lock:
+            if not self._is_fresh():
+                return None
+            return telegram_id in self._admins
+
+
+# Словарь ограниченного размера с вытеснением давно не использованных ключей
+class LRUCache:
+    """Хранит до maxsize значений (0 — ничего не хранит); при переполнении
+    забывает ключ, к которому дольше всего не обращались.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def peek(self, key):
+        """(найден ли ключ, значение или None)"""
+        with self._lock:
+            if key not in self._values:
+                return False, None
+            self._values.move_to_end(key)
+            return True, self._values[key]
+
+    def set(self, key, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            if len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+
+# Кэш готовых экранов бота: текстов и клавиатур
+class RenderCache:
+    """Хранит результат функции отрисовки по ключу вместе с версией данных,
+    из которых он построен (например, MenuCache.version). При другой версии
+    экран строится заново и заменяет прежний.
+
+    Используется только из цикла событий бота, поэтому без блокировок.
+    """
+
+    def __init__(self):
+        self._screens = {}
+
+    def get(self, key, version, build, *args):
+        """Экран для key; build(*args) вызывается только при промахе"""
+        entry = self._screens.get(key)
+        if entry is None or entry[0] != version:
+            entry = (version, build(*args))
+            self._screens[key] = entry
+        return entry[1]
+
+
+# Межпроцессная инвалидация кэшей через PostgreSQL LISTEN/NOTIFY
+class CacheInvalidationListener(threading.Thread):
+    """Фоновый поток, слушающий канал NOTIFY и сбрасывающий кэши.
+
+    connect — функция, возвращающая новое соединение psycopg2,
+    handlers — словарь {payload уведомления: функция инвалидации}.
+    При переподключении сбрасываются все кэши, так как уведомления
+    за время разрыва могли быть потеряны.
+    """
+
+    RECONNECT_DELAY = 5
+
+    def __init__(self, connect, channel: str, handlers: dict):
+        super().__init__(name="cache-invalidation", daemon=True)
+        self.connect = connect
+        self.channel = channel
+        self.handlers = handlers
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _invalidate_all(self) -> None:
+        for handler in self.handlers.values():
+            handler()
+
+    def _listen(self) -> None:
+        connection = self.connect()
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            self._invalidate_all()
+
+            while not self._stop_event.is_set():
+                if select.select([connection], [], [], 1.0) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    handler = self.handlers.get(notify.payload)
+                    if handler:
+                        handler()
+        finally:
+            connection.close()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Error in cache invalidation listener")
+                self._stop_event.wait(self.RECONNECT_DELAY)
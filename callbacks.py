@@ -0,0 +1,263 @@
+import enum
+import logging
+from telegram.ext import CallbackQueryHandler
+from database import OrderStatus
+
+logger = logging.getLogger(__name__)
+
+# Формат данных кнопки: "<версия>:<действие>:<аргумент>:...". При
+# несовместимом изменении аргументов версия увеличивается, и кнопки из
+# старых сообщений получают ответ «кнопка устарела», а не чужой обработчик
+CALLBACK_VERSION = "1"
+CALLBACK_SEPARATOR = ":"
+
+# Telegram принимает callback_data длиной до 64 байт
+MAX_CALLBACK_DATA_BYTES = 64
+
+STALE_BUTTON_TEXT = "Эта кнопка устарела. Откройте меню заново: /start"
+
+
+class CallbackAction:
+    """Действие кнопки: имя и типы аргументов
+
+    Аргументы — int, str, подкласс Enum (кодируется именем члена) или
+    кортеж допустимых значений (строк или чисел): всё, чего нет в кортеже,
+    отвергается при разборе. Вызов действия возвращает callback_data.
+    """
+
+    def __init__(self, name: str, *arg_types):
+        if CALLBACK_SEPARATOR in name:
+            raise ValueError(f"Недопустимое имя действия: {name}")
+        self.name = name
+        self.arg_types = arg_types
+        self._prefix = f"{CALLBACK_VERSION}{CALLBACK_SEPARATOR}{name}"
+
+    def __repr__(self) -> str:
+        return f"CallbackAction({self.name!r})"
+
+    def __call__(self, *args) -> str:
+        if len(args) != len(self.arg_types):
+            raise TypeError(
+                f"{self.name}: ожидается {len(self.arg_types)} аргументов, "
+                f"передано {len(args)}"
+            )
+        parts = [self._prefix]
+        for arg_type, value in zip(self.arg_types, args):
+            parts.append(_encode_arg(arg_type, value))
+        data = CALLBACK_SEPARATOR.join(parts)
+        if len(data.encode()) > MAX_CALLBACK_DATA_BYTES:
+            raise ValueError(f"callback_data длиннее 64 байт: {data}")
+        return data
+
+    def parse_args(self, raw_args) -> tuple:
+        """Привести строковые аргументы к типам действия (ValueError при ошибке)"""
+        if len(raw_args) != len(self.arg_types):
+            raise ValueError(f"{self.name}: неверное число аргументов")
+        return tuple(
+            _decode_arg(arg_type, raw)
+            for arg_type, raw in zip(self.arg_types, raw_args)
+        )
+
+
+def _encode_arg(arg_type, value) -> str:
+    if isinstance(arg_type, type) and issubclass(arg_type, enum.Enum):
+        return arg_type(value).name.lower()
+    text = str(value)
+    if CALLBACK_SEPARATOR in text:
+        raise ValueError(f"Аргумент содержит разделитель: {text}")
+    if isinstance(arg_type, tuple) and value not in arg_type:
+        raise ValueError(f"Недопустимое значение: {text}")
+    return text
+
+
+def _decode_arg(arg_type, raw: str):
+    if arg_type is int:
+        return int(raw)
+    if arg_type is str:
+        return raw
+    if isinstance(arg_type, tuple):
+        for choice in arg_type:
+            if str(choice) == raw:
+                return choice
+        raise ValueError(f"Недопустимое значение: {raw}")
+    try:
+        return arg_type[raw.upper()]
+    except KeyError:
+        raise ValueError(f"Недопустимое значение: {raw}") from None
+
+
+# Действия кнопок бота
+
+# Главное меню и покупатель
+MAIN = CallbackAction("main")
+MENU = CallbackAction("menu")
+ABOUT = CallbackAction("about")
+MY_ORDERS = CallbackAction("orders")
+MY_ORDERS_PAGE = CallbackAction("orders_page", ("older", "newer"), int)
+ITEM = CallbackAction("item", int)
+QUANTITY = CallbackAction("qty", int, (1, -1))
+QUANTITY_VALUE = CallbackAction("qty_value")
+ADD_TO_CART = CallbackAction("add", int)
+VIEW_CART = CallbackAction("cart")
+CLEAR_CART = CallbackAction("cart_clear")
+CONFIRM_ORDER = CallbackAction("checkout")
+# Аргумент — минуты до готовности, 0 — «как можно быстрее»
+ORDER_TIME = CallbackAction("time", (0, 15, 30, 45, 60))
+
+# Администратор
+ADMIN_PANEL = CallbackAction("admin")
+ADMIN_STATS = CallbackAction("stats")
+ORDERS_BOARD = CallbackAction("board")
+ORDERS_BOARD_PAGE = CallbackAction("board_page", ("desired", "created"), int)
+SET_ORDER_STATUS = CallbackAction("status", int, OrderStatus)
+MENU_MANAGEMENT = CallbackAction("menu_admin")
+START_ADD_ITEM = CallbackAction("item_new")
+LIST_MENU_ITEMS = CallbackAction("items")
+DELETE_ITEM = CallbackAction("item_del", int)
+ADMIN_MANAGEMENT = CallbackAction("admins")
+START_ADD_ADMIN = CallbackAction("admin_new")
+LIST_ADMINS = CallbackAction("admin_list")
+REMOVE_ADMIN = CallbackAction("admin_del", int)
+
+
+def _split_args(rest: str) -> list:
+    return rest.split("_") if rest else []
+
+
+# Кнопки без версии из сообщений, отправленных до появления кодека, — только
+# форматы, которые выдавала прежняя версия бота:
+# (данные или префикс, точное совпадение, действие, разбор остатка строки)
+LEGACY_CALLBACKS = [
+    ("menu", True, MENU, _split_args),
+    ("about", True, ABOUT, _split_args),
+    ("back_to_main", True, MAIN, _split_args),
+    ("my_orders", True, MY_ORDERS, _split_args),
+    ("order_", False, ITEM, _split_args),
+    ("increase_", False, QUANTITY, lambda rest: [rest, "1"]),
+    ("decrease_", False, QUANTITY, lambda rest: [rest, "-1"]),
+    ("quantity", True, QUANTITY_VALUE, _split_args),
+    ("add_to_cart_", False, ADD_TO_CART, _split_args),
+    ("view_cart", True, VIEW_CART, _split_args),
+    ("clear_cart", True, CLEAR_CART, _split_args),
+    ("confirm_order", True, CONFIRM_ORDER, _split_args),
+    ("time_", False, ORDER_TIME, lambda rest: ["0" if rest == "asap" else rest]),
+    ("admin_panel", True, ADMIN_PANEL, _split_args),
+    ("admin_stats", True, ADMIN_STATS, _split_args),
+    ("manage_orders", True, ORDERS_BOARD, _split_args),
+    ("complete_order_", False, SET_ORDER_STATUS, lambda rest: [rest, "ready"]),
+    ("menu_management", True, MENU_MANAGEMENT, _split_args),
+    ("start_add_item", True, START_ADD_ITEM, _split_args),
+    ("list_menu_items", True, LIST_MENU_ITEMS, _split_args),
+    ("delete_item_", False, DELETE_ITEM, _split_args),
+    ("admin_management", True, ADMIN_MANAGEMENT, _split_args),
+    ("add_admin", True, START_ADD_ADMIN, _split_args),
+    ("remove_admin", True, LIST_ADMINS, _split_args),
+    ("remove_admin_", False, REMOVE_ADMIN, _split_args),
+]
+
+
+class PrefixTrie:
+    """Префиксное дерево с поиском самого длинного подходящего префикса
+
+    Значение, добавленное с exact=True, подходит только строке целиком.
+    Поиск проходит строку один раз, независимо от числа записей.
+    """
+
+    _VALUE = object()
+    _EXACT = object()
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, key: str, value, exact: bool = False) -> None:
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        node[self._EXACT if exact else self._VALUE] = value
+
+    def longest_prefix(self, text: str):
+        """(значение, остаток строки) для самого длинного префикса или None"""
+        node = self._root
+        found = None
+        for index, char in enumerate(text):
+            if self._VALUE in node:
+                found = (node[self._VALUE], text[index:])
+            node = node.get(char)
+            if node is None:
+                return found
+        if self._EXACT in node:
+            return node[self._EXACT], ""
+        if self._VALUE in node:
+            return node[self._VALUE], ""
+        return found
+
+
+class RouterCallbackQueryHandler(CallbackQueryHandler):
+    """CallbackQueryHandler, передающий все нажатия кнопок маршрутизатору"""
+
+    __slots__ = ("router",)
+
+    def __init__(self, router: "CallbackRouter"):
+        super().__init__(router.dispatch)
+        self.router = router
+
+
+class CallbackRouter:
+    """Единый диспетчер нажатий кнопок
+
+    Данные текущей версии разбираются разделением строки и поиском действия
+    в словаре, кнопки старого формата — по префиксному дереву. Обработчик
+    вызывается как callback(update, context, *аргументы).
+    """
+
+    def __init__(self, legacy=LEGACY_CALLBACKS):
+        self._routes = {}
+        self._legacy = PrefixTrie()
+        for key, exact, action, parse in legacy:
+            self._legacy.add(key, (action, parse), exact=exact)
+
+    def add(self, action: CallbackAction, callback) -> None:
+        if action.name in self._routes:
+            raise ValueError(f"Действие {action.name} уже зарегистрировано")
+        self._routes[action.name] = (action, callback)
+
+    def handler(self) -> RouterCallbackQueryHandler:
+        return RouterCallbackQueryHandler(self)
+
+    def wrap_callbacks(self, wrapper) -> None:
+        """Обернуть обработчики всех действий (например, метриками)"""
+        for name, (action, callback) in self._routes.items():
+            self._routes[name] = (action, wrapper(callback))
+
+    def resolve(self, data: str):
+        """(обработчик, аргументы) для callback_data или None"""
+        if not data:
+            return None
+        try:
+            if CALLBACK_SEPARATOR in data:
+                version, name, *raw_args = data.split(CALLBACK_SEPARATOR)
+                if version != CALLBACK_VERSION or name not in self._routes:
+                    return None
+                action, callback = self._routes[name]
+                return callback, action.parse_args(raw_args)
+
+            match = self._legacy.longest_prefix(data)
+            if match is None:
+                return None
+            (action, parse), rest = match
+            if action.name not in self._routes:
+                return None
+            callback = self._routes[action.name][1]
+            return callback, action.parse_args(parse(rest))
+        except ValueError:
+            return None
+
+    async def dispatch(self, update, context):
+        query = update.callback_query
+        route = self.resolve(query.data)
+        if route is None:
+            logger.warning("Unknown callback data", extra={"data": query.data})
+            await query.answer(STALE_BUTTON_TEXT, show_alert=True)
+            return
+        callback, args = route
+        return await callback(update, context, *args)
@@ -13,8 +13,108 @@ class DatabaseConfig:
     DB_PORT = os.getenv("DB_PORT", "5432")
     DB_NAME = os.getenv("DB_NAME", "postgres")
     DB_SCHEMA = os.getenv("DB_SCHEMA", "public")
+    # Число потоков для выполнения запросов к БД из асинхронных обработчиков
+    DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "5"))
+
+    # Настройки пула соединений
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Время жизни соединения в секундах (-1 — без ограничения)
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Ограничение времени выполнения запроса в миллисекундах (0 — без ограничения)
+    DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", "0"))
+    # Создавать недостающие таблицы при запуске (для разработки). Обычно схема
+    # создаётся отдельным шагом развёртывания: alembic upgrade head
+    DB_CREATE_TABLES = os.getenv("DB_CREATE_TABLES", "false").lower() == "true"
 
     @classmethod
     def get_database_url(cls) -> str:
         """Формирует URL для подключения к базе данных"""
+        database_url = os.getenv("DATABASE_URL")
+        if database_url:
+            return database_url
         return f"postgresql://{cls.DB_USER}:{cls.DB_PASSWORD}@{cls.DB_HOST}:{cls.DB_PORT}/{cls.DB_NAME}"
+
+
+class CacheConfig:
+    """Конфигурация кэшей в памяти процесса"""
+
+    # Время жизни кэша меню в секундах (0 — до явной инвалидации)
+    MENU_CACHE_TTL = float(os.getenv("MENU_CACHE_TTL", "300"))
+    # Время жизни кэша администраторов в секундах
+    ADMIN_CACHE_TTL = float(os.getenv("ADMIN_CACHE_TTL", "60"))
+    # Сколько последних пар (telegram_id, username) помнить, чтобы повторный
+    # /start не обращался к БД (0 — не помнить)
+    SEEN_USERS_CACHE_SIZE = int(os.getenv("SEEN_USERS_CACHE_SIZE", "10000"))
+    # Межпроцессная инвалидация через PostgreSQL LISTEN/NOTIFY
+    CACHE_NOTIFY_ENABLED = os.getenv("CACHE_NOTIFY_ENABLED", "false").lower() == "true"
+    CACHE_NOTIFY_CHANNEL = os.getenv("CACHE_NOTIFY_CHANNEL", "k89_cache")
+
+
+class PersistenceConfig:
+    """Конфигурация сохранения состояния пользователей между перезапусками"""
+
+    PERSISTENCE_ENABLED = os.getenv("PERSISTENCE_ENABLED", "true").lower() == "true"
+    # Интервал пакетной записи изменённых user_data в секундах
+    PERSISTENCE_UPDATE_INTERVAL = float(os.getenv("PERSISTENCE_UPDATE_INTERVAL", "10"))
+    # Перечитывать user_data из БД перед каждым обновлением (несколько экземпляров)
+    PERSISTENCE_REFRESH_ON_UPDATE = (
+        os.getenv("PERSISTENCE_REFRESH_ON_UPDATE", "false").lower() == "true"
+    )
+    # Состояние, не менявшееся дольше стольких дней, удаляется при запуске
+    # бота (0 — хранить бессрочно)
+    PERSISTENCE_STATE_TTL_DAYS = float(os.getenv("PERSISTENCE_STATE_TTL_DAYS", "30"))
+
+
+class BotConfig:
+    """Конфигурация получения обновлений от Telegram"""
+
+    # Режим работы: polling или webhook
+    BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+    # Сколько обновлений обрабатывается одновременно (1 — последовательно)
+    BOT_CONCURRENT_UPDATES = int(os.getenv("BOT_CONCURRENT_UPDATES", "16"))
+    WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+    WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+    WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+    # Публичный HTTPS-адрес вебхука; если не задан, вебхук не регистрируется
+    WEBHOOK_URL = os.getenv("WEBHOOK_URL") or None
+    WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN") or None
+    WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+
+    # Лимиты рассылки уведомлений (сообщений в секунду) и число повторов
+    NOTIFY_GLOBAL_RATE = float(os.getenv("NOTIFY_GLOBAL_RATE", "25"))
+    NOTIFY_PER_CHAT_RATE = float(os.getenv("NOTIFY_PER_CHAT_RATE", "1"))
+    NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", "3"))
+
+    # Пауза после перерисовки карточки товара (мс): нажатия ➕/➖ за это время
+    # объединяются в одно следующее редактирование сообщения
+    QUANTITY_EDIT_DELAY_MS = int(os.getenv("QUANTITY_EDIT_DELAY_MS", "300"))
+
+
+class MetricsConfig:
+    """Конфигурация метрик работы кухни и процесса бота"""
+
+    # Смещение местного времени кофейни от UTC в часах (Новый Уренгой — UTC+5),
+    # по нему строится распределение заказов по часам
+    METRICS_UTC_OFFSET_HOURS = int(os.getenv("METRICS_UTC_OFFSET_HOURS", "5"))
+    # Период, за который считаются метрики в статистике: day, week или month
+    METRICS_PERIOD = os.getenv("METRICS_PERIOD", "week")
+
+    # HTTP-сервер метрик Prometheus (/metrics); порт 0 — не запускать
+    METRICS_LISTEN = os.getenv("METRICS_LISTEN", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+
+class LoggingConfig:
+    """Конфигурация журнала и трассировки"""
+
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    # json — одна строка JSON на запись, text — обычный текст
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+    # Обработчики и запросы к БД дольше порога (мс) пишутся с уровнем WARNING
+    LOG_SLOW_HANDLER_MS = float(os.getenv("LOG_SLOW_HANDLER_MS", "1000"))
+    LOG_SLOW_DB_MS = float(os.getenv("LOG_SLOW_DB_MS", "300"))
+    # Спаны OpenTelemetry (нужны пакеты opentelemetry-api и opentelemetry-sdk)
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
@@ -1,6 +1,15 @@
 import os
+import enum
+import time
+import logging
+import asyncio
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import (
     create_engine,
+    exc,
     Column,
     Integer,
     BigInteger,
@@ -9,14 +18,32 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
+    CheckConstraint,
     MetaData,
+    JSON,
+    select,
+    func,
+    case,
+    true,
+    text,
+    insert,
+    update,
+    cast,
+    extract,
 )
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, selectinload, joinedload
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from config import DatabaseConfig, CacheConfig, MetricsConfig
+from cache import MenuCache, AdminCache, LRUCache, CacheInvalidationListener
+from instrumentation import observe_db_call
 
-load_dotenv()
+
+logger = logging.getLogger(__name__)
 
 # Создаём метаданные с указанием схемы
 metadata = MetaData(schema=os.getenv("DB_SCHEMA", "public"))
@@ -30,7 +57,7 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True)
-    telegram_id = Column(String, unique=True, nullable=False)
+    telegram_id = Column(BigInteger, unique=True, nullable=False)
     username = Column(String, nullable=True)
     is_admin = Column(Boolean, default=False)  # Флаг администратора
 
@@ -45,16 +72,96 @@ class MenuItem(Base):
     is_available = Column(Boolean, default=True)  # Доступен ли для заказа
 
 
+# Статусы заказа; в БД хранится значение (название для клиента)
+class OrderStatus(str, enum.Enum):
+    ACCEPTED = "Принят"
+    IN_PROGRESS = "Готовится"
+    READY = "Готов"
+    PICKED_UP = "Выдан"
+    CANCELLED = "Отменён"
+
+
+# Допустимые переходы: статус -> в какие статусы из него можно перейти
+ORDER_TRANSITIONS = {
+    OrderStatus.ACCEPTED: (
+        OrderStatus.IN_PROGRESS,
+        OrderStatus.READY,
+        OrderStatus.CANCELLED,
+    ),
+    OrderStatus.IN_PROGRESS: (OrderStatus.READY, OrderStatus.CANCELLED),
+    OrderStatus.READY: (OrderStatus.PICKED_UP, OrderStatus.CANCELLED),
+    OrderStatus.PICKED_UP: (),
+    OrderStatus.CANCELLED: (),
+}
+
+# Колонка заказа, в которую записывается время перехода в статус
+# (время перехода в ACCEPTED — created_at)
+ORDER_STATUS_TIMESTAMPS = {
+    OrderStatus.IN_PROGRESS: "started_at",
+    OrderStatus.READY: "ready_at",
+    OrderStatus.PICKED_UP: "picked_up_at",
+    OrderStatus.CANCELLED: "cancelled_at",
+}
+
+# Заказы на доске баристы: ещё не выданы и не отменены
+ACTIVE_ORDER_STATUSES = (
+    OrderStatus.ACCEPTED.value,
+    OrderStatus.IN_PROGRESS.value,
+    OrderStatus.READY.value,
+)
+
+# Очередь на приготовление
+QUEUED_ORDER_STATUSES = (OrderStatus.ACCEPTED.value, OrderStatus.IN_PROGRESS.value)
+
+# Выполненные заказы
+COMPLETED_ORDER_STATUSES = (OrderStatus.READY.value, OrderStatus.PICKED_UP.value)
+
+
 # Таблица заказов
 class Order(Base):
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True)
-    telegram_id = Column(String, nullable=False)
-    status = Column(String, default="Принят")
+    telegram_id = Column(BigInteger, nullable=False)
+    status = Column(String, default=OrderStatus.ACCEPTED.value)
     created_at = Column(DateTime, default=datetime.utcnow)
     desired_time = Column(String)
+    desired_at = Column(DateTime)  # К какому времени приготовить заказ
+    started_at = Column(DateTime)  # Взят в работу
+    ready_at = Column(DateTime)  # Приготовлен
+    picked_up_at = Column(DateTime)  # Выдан клиенту
+    cancelled_at = Column(DateTime)  # Отменён
+    notified_at = Column(DateTime)  # Клиенту отправлено уведомление о готовности
     items = relationship("OrderItem", back_populates="order")
+    # Заказ может быть оформлен до /start, поэтому связь без внешнего ключа
+    user = relationship(
+        "User",
+        primaryjoin="foreign(Order.telegram_id) == User.telegram_id",
+        viewonly=True,
+    )
+
+    __table_args__ = (
+        CheckConstraint(
+            status.in_([s.value for s in OrderStatus]), name="ck_orders_status"
+        ),
+        # История заказов пользователя
+        Index("ix_orders_telegram_id_id", "telegram_id", "id"),
+        # Статистика за период
+        Index("ix_orders_created_at", "created_at"),
+        # Активные заказы (частичный индекс — только незавершённые)
+        Index(
+            "ix_orders_active_created_at",
+            "created_at",
+            postgresql_where=status.in_(ACTIVE_ORDER_STATUSES),
+            sqlite_where=status.in_(ACTIVE_ORDER_STATUSES),
+        ),
+        Index(
+            "ix_orders_active_desired_at",
+            "desired_at",
+            postgresql_where=status.in_(ACTIVE_ORDER_STATUSES),
+            sqlite_where=status.in_(ACTIVE_ORDER_STATUSES),
+        ),
+    )
 
 
 # Таблица товаров в заказе
@@ -73,164 +180,496 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="items")  # Связь с заказом
     menu_item = relationship("MenuItem")  # Связь с элементом меню
 
+    __table_args__ = (Index("ix_order_items_order_id", "order_id"),)
+
+
+# Таблица сохранённого состояния пользователей (корзина, диалоги)
+class UserState(Base):
+    __tablename__ = "user_states"
+
+    telegram_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    data = Column(JSON, nullable=False)  # Содержимое context.user_data
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def _has_user_state(data: dict) -> bool:
+    """Есть ли в user_data что сохранять: {"cart": []} считается пустым"""
+    return any(value not in (None, "", [], {}) for value in data.values())
+
+
+# Опции загрузки заказа вместе с товарами и их названиями (без N+1 запросов)
+ORDER_ITEMS_SELECTIN = selectinload(Order.items).joinedload(OrderItem.menu_item)
+ORDER_ITEMS_JOINED = joinedload(Order.items).joinedload(OrderItem.menu_item)
+
+
+def serialize_order_items(order):
+    """Преобразовать товары заказа в список словарей и посчитать сумму"""
+    items = []
+    total = 0
+    for item in order.items:
+        subtotal = item.price_at_time * item.quantity
+        items.append(
+            {
+                "name": item.menu_item.name,
+                "quantity": item.quantity,
+                "price": item.price_at_time,
+                "subtotal": subtotal,
+            }
+        )
+        total += subtotal
+    return items, total
+
+
+# Периоды статистики заказов
+STATS_PERIODS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=30),
+}
+
+
+# Метрики пула соединений
+class PoolMetrics:
+    """Счётчики выдачи соединений из пула (потокобезопасные)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.overflow_events = 0
+        self.timeouts = 0
+
+    def record_checkout(self, wait_time: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def record_overflow(self) -> None:
+        with self._lock:
+            self.overflow_events += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_time_total": self.wait_time_total,
+                "wait_time_max": self.wait_time_max,
+                "wait_time_avg": (
+                    self.wait_time_total / self.checkouts if self.checkouts else 0.0
+                ),
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool, записывающий время ожидания соединения и выход за pool_size"""
+
+    metrics = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.record_timeout()
+            raise
+        if self.metrics:
+            self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def _inc_overflow(self):
+        created = super()._inc_overflow()
+        # Отрицательное значение _overflow — соединения в пределах pool_size
+        if created and self._overflow > 0 and self.metrics:
+            self.metrics.record_overflow()
+        return created
+
+    def recreate(self):
+        # Сохраняем счётчики при пересоздании пула (например, после dispose)
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
 
 # Класс для работы с базой данных
 class Database:
     def __init__(self):
         # Чтение параметров подключения из .env
-        self.db_url = os.getenv("DATABASE_URL", None)  # URL базы данных
-
-        if not self.db_url:
-            db_user = os.getenv("DB_USER")
-            db_password = os.getenv("DB_PASSWORD")
-            db_host = os.getenv("DB_HOST")
-            db_port = os.getenv("DB_PORT")
-            db_name = os.getenv("DB_NAME")
-            # Формируем строку подключения для PostgreSQL
-            self.db_url = (
-                f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+        self.db_url = DatabaseConfig.get_database_url()
+
+        connect_args = {}
+        if (
+            DatabaseConfig.DB_STATEMENT_TIMEOUT
+            and make_url(self.db_url).get_backend_name() == "postgresql"
+        ):
+            connect_args[
+                "options"
+            ] = f"-c statement_timeout={DatabaseConfig.DB_STATEMENT_TIMEOUT}"
+
+        self.pool_metrics = PoolMetrics()
+        self.engine = create_engine(
+            self.db_url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=DatabaseConfig.DB_POOL_SIZE,
+            max_overflow=DatabaseConfig.DB_MAX_OVERFLOW,
+            pool_timeout=DatabaseConfig.DB_POOL_TIMEOUT,
+            pool_recycle=DatabaseConfig.DB_POOL_RECYCLE,
+            pool_pre_ping=DatabaseConfig.DB_POOL_PRE_PING,
+            connect_args=connect_args,
+        )
+        self.engine.pool.metrics = self.pool_metrics
+        self.Session = sessionmaker(bind=self.engine)
+
+        self.menu_cache = MenuCache(ttl=CacheConfig.MENU_CACHE_TTL)
+        self.admin_cache = AdminCache(ttl=CacheConfig.ADMIN_CACHE_TTL)
+        # telegram_id -> username, уже записанный в users этим процессом
+        self.seen_users = LRUCache(CacheConfig.SEEN_USERS_CACHE_SIZE)
+        self.notify_enabled = (
+            CacheConfig.CACHE_NOTIFY_ENABLED
+            and self.engine.dialect.name == "postgresql"
+        )
+        self.invalidation_listener = None
+        if self.notify_enabled:
+            self.invalidation_listener = CacheInvalidationListener(
+                self._connect_raw,
+                CacheConfig.CACHE_NOTIFY_CHANNEL,
+                {
+                    "menu": self.menu_cache.invalidate,
+                    "admins": self.admin_cache.invalidate,
+                },
+            )
+            self.invalidation_listener.start()
+
+    def _upsert(self, model):
+        """INSERT с поддержкой ON CONFLICT для текущего диалекта"""
+        if self.engine.dialect.name == "sqlite":
+            return sqlite.insert(model)
+        return postgresql.insert(model)
+
+    def _connect_raw(self):
+        """Отдельное соединение DBAPI вне пула (для LISTEN)"""
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        return self.engine.dialect.connect(*cargs, **cparams)
+
+    def _notify_changed(self, session, payload: str) -> None:
+        """Сообщить другим процессам об изменении данных (в той же транзакции)"""
+        if self.notify_enabled:
+            session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": CacheConfig.CACHE_NOTIFY_CHANNEL, "payload": payload},
             )
 
-        self.engine = create_engine(self.db_url)
-        self.Session = sessionmaker(bind=self.engine)
-        self.create_tables()
+    def close(self) -> None:
+        """Остановить фоновые потоки и закрыть соединения"""
+        if self.invalidation_listener:
+            self.invalidation_listener.stop()
+        self.engine.dispose()
 
     def create_tables(self):
-        """Создание таблиц в базе данных"""
+        """Создание таблиц в базе данных
+
+        Вызывается только при DB_CREATE_TABLES=true: обычно схема создаётся
+        миграциями (alembic upgrade head), а не при каждом запуске бота.
+        """
         Base.metadata.create_all(self.engine)
 
-    def get_menu_items(self):
-        """Получить все элементы меню"""
-        session = self.Session()
-        items = session.query(MenuItem).filter_by(is_available=True).all()
-        result = []
-        for item in items:
-            result.append(
-                {
-                    "id": item.id,
-                    "name": item.name,
-                    "price": item.price,
-                    "is_available": item.is_available,
-                }
-            )
-        session.close()
-        return result
+    def ping(self) -> None:
+        """Открыть первое соединение пула и проверить доступность БД"""
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
 
-    def get_menu_item(self, item_id):
-        """Получить элемент меню по ID"""
+    def get_pool_stats(self) -> dict:
+        """Получить состояние и метрики пула соединений"""
+        pool = self.engine.pool
+        stats = {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        }
+        stats.update(self.pool_metrics.snapshot())
+        return stats
+
+    def _load_menu(self):
+        """Загрузить все товары меню (для кэша)"""
         session = self.Session()
-        item = session.query(MenuItem).filter_by(id=item_id).first()
-        if item:
-            result = {
+        items = session.query(MenuItem).order_by(MenuItem.id).all()
+        result = [
+            {
                 "id": item.id,
                 "name": item.name,
                 "price": item.price,
                 "is_available": item.is_available,
             }
-        else:
-            result = None
+            for item in items
+        ]
         session.close()
         return result
 
+    def get_menu_items(self):
+        """Получить все элементы меню"""
+        return self.menu_cache.get_available(self._load_menu)
+
+    def get_menu_item(self, item_id):
+        """Получить элемент меню по ID"""
+        return self.menu_cache.get_item(item_id, self._load_menu)
+
     def get_user_orders(self, telegram_id):
         """Получить заказы пользователя по Telegram ID"""
         session = self.Session()
         orders = (
-            session.query(Order).filter_by(telegram_id=str(telegram_id)).all()
-        )  # Преобразуем в строку
+            session.query(Order)
+            .options(ORDER_ITEMS_SELECTIN)
+            .filter_by(telegram_id=telegram_id)
+            .all()
+        )
 
         result = []
         for order in orders:
-            order_data = {
-                "id": order.id,
-                "status": order.status,
-                "created_at": order.created_at,
-                "items": [],
-            }
-            total = 0
-            for item in order.items:
-                order_data["items"].append(
-                    {
-                        "name": item.menu_item.name,
-                        "quantity": item.quantity,
-                        "price": item.price_at_time,
-                        "subtotal": item.price_at_time * item.quantity,
-                    }
-                )
-                total += item.price_at_time * item.quantity
-            order_data["total"] = total
-            result.append(order_data)
+            items, total = serialize_order_items(order)
+            result.append(
+                {
+                    "id": order.id,
+                    "status": order.status,
+                    "created_at": order.created_at,
+                    "items": items,
+                    "total": total,
+                }
+            )
 
         session.close()
         return result
 
-    def is_admin(self, telegram_id):
-        """Проверить, является ли пользователь администратором"""
+    def get_user_orders_page(
+        self, telegram_id, before_id=None, after_id=None, limit: int = 5
+    ) -> dict:
+        """Получить страницу истории заказов пользователя (новые сначала)
+
+        Пагинация по ключу: before_id — страница заказов старше указанного,
+        after_id — страница заказов новее указанного. Выбирается limit + 1
+        строк, чтобы без COUNT узнать, есть ли следующая страница.
+        """
         session = self.Session()
-        user = (
-            session.query(User)
-            .filter_by(telegram_id=str(telegram_id), is_admin=True)
-            .first()
-        )  # Преобразуем в строку
+        query = (
+            session.query(Order)
+            .options(ORDER_ITEMS_SELECTIN)
+            .filter(Order.telegram_id == telegram_id)
+        )
+        if after_id is not None:
+            query = query.filter(Order.id > after_id).order_by(Order.id.asc())
+        else:
+            if before_id is not None:
+                query = query.filter(Order.id < before_id)
+            query = query.order_by(Order.id.desc())
+        orders = query.limit(limit + 1).all()
+
+        has_more = len(orders) > limit
+        orders = orders[:limit]
+        if after_id is not None:
+            orders.reverse()
+
+        result = {
+            "orders": [],
+            "has_older": has_more if after_id is None else True,
+            "has_newer": has_more if after_id is not None else before_id is not None,
+        }
+        for order in orders:
+            items, total = serialize_order_items(order)
+            result["orders"].append(
+                {
+                    "id": order.id,
+                    "status": order.status,
+                    "created_at": order.created_at,
+                    "items": items,
+                    "total": total,
+                }
+            )
+
         session.close()
-        return user is not None
+        return result
+
+    def _load_admins(self):
+        """Загрузить Telegram ID всех администраторов (для кэша)"""
+        session = self.Session()
+        admins = (
+            session.query(User.telegram_id)
+            .filter_by(is_admin=True)
+            .order_by(User.id)
+            .all()
+        )
+        session.close()
+        return [admin.telegram_id for admin in admins]
+
+    def is_admin(self, telegram_id):
+        """Проверить, является ли пользователь администратором"""
+        return self.admin_cache.contains(int(telegram_id), self._load_admins)
+
+    def _insert_order(
+        self,
+        session,
+        telegram_id,
+        lines,
+        desired_time=None,
+        ready_in_minutes=None,
+        require_all=False,
+    ) -> dict:
+        """Создать заказ с товарами за фиксированное число запросов
+
+        lines — список пар (ID товара, количество). Все товары загружаются
+        одним запросом IN (...), заказ вставляется через INSERT ... RETURNING,
+        товары заказа — одним пакетным INSERT. Возвращает словарь с ID заказа
+        (None, если заказ не создан) и списком недоступных товаров.
+        """
+        menu_ids = {menu_item_id for menu_item_id, _ in lines}
+        menu = {
+            row.id: row
+            for row in session.query(
+                MenuItem.id, MenuItem.name, MenuItem.price, MenuItem.is_available
+            ).filter(MenuItem.id.in_(menu_ids))
+        }
+
+        order_items = []
+        unavailable = []
+        for menu_item_id, quantity in lines:
+            menu_item = menu.get(menu_item_id)
+            if menu_item and menu_item.is_available:
+                order_items.append(
+                    {
+                        "menu_item_id": menu_item.id,
+                        "quantity": quantity,
+                        "price_at_time": menu_item.price,  # Актуальная цена из меню
+                    }
+                )
+            else:
+                unavailable.append(
+                    {
+                        "item_id": menu_item_id,
+                        "name": menu_item.name if menu_item else None,
+                    }
+                )
+
+        result = {"order_id": None, "unavailable": unavailable}
+        if not order_items or (require_all and unavailable):
+            return result
+
+        created_at = datetime.utcnow()
+        order_id = session.execute(
+            insert(Order)
+            .values(
+                telegram_id=telegram_id,
+                status=OrderStatus.ACCEPTED.value,
+                created_at=created_at,
+                desired_time=desired_time,
+                desired_at=created_at + timedelta(minutes=ready_in_minutes or 0),
+            )
+            .returning(Order.id)
+        ).scalar_one()
+        for order_item in order_items:
+            order_item["order_id"] = order_id
+        session.execute(insert(OrderItem), order_items)
+
+        result["order_id"] = order_id
+        return result
 
     def create_order(self, telegram_id, items):
         """Создать заказ"""
         session = self.Session()
         try:
-            order = Order(
-                telegram_id=str(telegram_id), status="Принят"
-            )  # Преобразуем в строку
-            session.add(order)
-            session.flush()  # Генерация ID для заказа
-
-            for item in items:
-                menu_item = (
-                    session.query(MenuItem).filter_by(id=item["menu_item_id"]).first()
-                )
-                if menu_item and menu_item.is_available:
-                    order_item = OrderItem(
-                        order_id=order.id,
-                        menu_item_id=item["menu_item_id"],
-                        quantity=item["quantity"],
-                        price_at_time=menu_item.price,  # Берем актуальную цену из меню
-                    )
-                    session.add(order_item)
-                else:
-                    session.rollback()
-                    return None  # Если товар не найден или недоступен
-
+            result = self._insert_order(
+                session,
+                telegram_id,
+                [(item["menu_item_id"], item["quantity"]) for item in items],
+                require_all=True,  # Если товар не найден или недоступен
+            )
             session.commit()
-            return order.id
+            return result["order_id"]
         except Exception as e:
             session.rollback()
             raise e
         finally:
             session.close()
 
-    def update_order_status(self, order_id, new_status):
-        """Обновить статус заказа"""
+    def update_order_status(self, order_id: int, new_status: OrderStatus) -> bool:
+        """Перевести заказ в новый статус и записать время перехода
+
+        Допустимость перехода проверяется в самом UPDATE (условие на текущий
+        статус), поэтому два одновременных нажатия не могут, например, выдать
+        уже отменённый заказ. Возвращает False, если заказа нет или переход
+        из его текущего статуса недопустим.
+        """
+        new_status = OrderStatus(new_status)
+        sources = [
+            status.value
+            for status, targets in ORDER_TRANSITIONS.items()
+            if new_status in targets
+        ]
+        values = {"status": new_status.value}
+        timestamp_column = ORDER_STATUS_TIMESTAMPS.get(new_status)
+        if timestamp_column:
+            values[timestamp_column] = datetime.utcnow()
+
         session = self.Session()
-        order = session.query(Order).filter_by(id=order_id).first()
-        if order:
-            order.status = new_status
+        try:
+            updated_id = session.execute(
+                update(Order)
+                .where(Order.id == order_id, Order.status.in_(sources))
+                .values(**values)
+                .returning(Order.id)
+                .execution_options(synchronize_session=False)
+            ).scalar_one_or_none()
             session.commit()
-        session.close()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return updated_id is not None
+
+    def is_user_seen(self, telegram_id: int, username: str = None) -> bool:
+        """Пользователь уже записан с этим username (по кэшу, без запроса)"""
+        seen, seen_username = self.seen_users.peek(telegram_id)
+        return seen and (username is None or seen_username == username)
 
     def create_user_if_not_exists(self, telegram_id: int, username: str = None) -> None:
-        """Создать пользователя, если он не существует"""
+        """Создать пользователя, если он не существует
+
+        Один запрос INSERT ... ON CONFLICT: username обновляется, только
+        если он изменился (пустой username не затирает сохранённый).
+        Одновременные вызовы для одного пользователя не конфликтуют.
+        """
+        if self.is_user_seen(telegram_id, username):
+            return
+
+        stmt = self._upsert(User).values(
+            telegram_id=telegram_id, username=username, is_admin=False
+        )
+        if username:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[User.telegram_id],
+                set_={"username": stmt.excluded.username},
+                where=User.username.is_distinct_from(stmt.excluded.username),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[User.telegram_id])
+
         session = self.Session()
-        user = session.query(User).filter_by(telegram_id=str(telegram_id)).first()
-        if not user:
-            user = User(telegram_id=str(telegram_id), username=username, is_admin=False)
-            session.add(user)
-            session.commit()
-        elif username and user.username != username:
-            # Обновляем username если он изменился
-            user.username = username
+        try:
+            session.execute(stmt)
             session.commit()
-        session.close()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        self.seen_users.set(telegram_id, username)
 
     def add_menu_item(self, name: str, price: float) -> int:
         """Добавить новый товар в меню"""
@@ -238,7 +677,9 @@ class Database:
         try:
             item = MenuItem(name=name, price=price, is_available=True)
             session.add(item)
+            self._notify_changed(session, "menu")
             session.commit()
+            self.menu_cache.invalidate()
             return item.id
         except Exception as e:
             session.rollback()
@@ -254,8 +695,10 @@ class Database:
             for key, value in kwargs.items():
                 if hasattr(item, key):
                     setattr(item, key, value)
+            self._notify_changed(session, "menu")
             session.commit()
             session.close()
+            self.menu_cache.invalidate()
             return True
         session.close()
         return False
@@ -263,39 +706,79 @@ class Database:
     def get_all_orders(self, status=None):
         """Получить все заказы (для админов)"""
         session = self.Session()
-        query = session.query(Order)
+        # Username получаем тем же запросом, товары — одним дополнительным
+        query = (
+            session.query(Order, User.username)
+            .outerjoin(Order.user)
+            .options(ORDER_ITEMS_SELECTIN)
+        )
         if status:
-            query = query.filter_by(status=status)
-        orders = query.all()
+            query = query.filter(Order.status == status)
+        rows = query.all()
 
         result = []
-        for order in orders:
-            # Получаем username пользователя
-            user = session.query(User).filter_by(telegram_id=order.telegram_id).first()
-            username = user.username if user and user.username else "Нет username"
-
-            order_data = {
-                "id": order.id,
-                "telegram_id": order.telegram_id,
-                "status": order.status,
-                "created_at": order.created_at,
-                "desired_time": order.desired_time,
-                "username": username,
-                "items": [],
-            }
-            total = 0
-            for item in order.items:
-                order_data["items"].append(
-                    {
-                        "name": item.menu_item.name,
-                        "quantity": item.quantity,
-                        "price": item.price_at_time,
-                        "subtotal": item.price_at_time * item.quantity,
-                    }
-                )
-                total += item.price_at_time * item.quantity
-            order_data["total"] = total
-            result.append(order_data)
+        for order, username in rows:
+            items, total = serialize_order_items(order)
+            result.append(
+                {
+                    "id": order.id,
+                    "telegram_id": order.telegram_id,
+                    "status": order.status,
+                    "created_at": order.created_at,
+                    "desired_time": order.desired_time,
+                    "username": username or "Нет username",
+                    "items": items,
+                    "total": total,
+                }
+            )
+
+        session.close()
+        return result
+
+    def get_active_orders_page(
+        self, sort: str = "desired", offset: int = 0, limit: int = 5
+    ) -> dict:
+        """Получить страницу активных заказов для баристы
+
+        sort="desired" — по времени, к которому заказ нужно приготовить,
+        sort="created" — по времени оформления. Выбирается не больше
+        limit + 1 заказов (по частичному индексу активных заказов).
+        """
+        if sort == "created":
+            order_by = (Order.created_at, Order.id)
+        else:
+            # desired_at заполняется при оформлении и миграцией 0004
+            order_by = (Order.desired_at, Order.id)
+
+        session = self.Session()
+        active = Order.status.in_(ACTIVE_ORDER_STATUSES)
+        total = session.query(func.count(Order.id)).filter(active).scalar()
+        rows = (
+            session.query(Order, User.username)
+            .outerjoin(Order.user)
+            .options(ORDER_ITEMS_SELECTIN)
+            .filter(active)
+            .order_by(*order_by)
+            .offset(offset)
+            .limit(limit + 1)
+            .all()
+        )
+
+        result = {"orders": [], "total": total, "has_more": len(rows) > limit}
+        for order, username in rows[:limit]:
+            items, order_total = serialize_order_items(order)
+            result["orders"].append(
+                {
+                    "id": order.id,
+                    "telegram_id": order.telegram_id,
+                    "status": order.status,
+                    "created_at": order.created_at,
+                    "desired_time": order.desired_time,
+                    "username": username or "Нет username",
+                    "items": items,
+                    "total": order_total,
+                }
+            )
 
         session.close()
         return result
@@ -303,75 +786,62 @@ class Database:
     def get_order_details(self, order_id: int):
         """Получить детальную информацию о заказе"""
         session = self.Session()
-        order = session.query(Order).filter_by(id=order_id).first()
+        order = (
+            session.query(Order)
+            .options(ORDER_ITEMS_JOINED)
+            .filter(Order.id == order_id)
+            .first()
+        )
         if not order:
             session.close()
             return None
 
+        items, total = serialize_order_items(order)
         result = {
             "id": order.id,
             "telegram_id": order.telegram_id,
             "status": order.status,
             "created_at": order.created_at,
-            "items": [],
+            "items": items,
+            "total": total,
         }
 
-        total = 0
-        for item in order.items:
-            result["items"].append(
-                {
-                    "name": item.menu_item.name,
-                    "quantity": item.quantity,
-                    "price": item.price_at_time,
-                    "subtotal": item.price_at_time * item.quantity,
-                }
-            )
-            total += item.price_at_time * item.quantity
-        result["total"] = total
-
         session.close()
         return result
 
     def get_user_by_telegram_id(self, telegram_id: int):
         """Получить пользователя по Telegram ID"""
         session = self.Session()
-        user = (
-            session.query(User).filter_by(telegram_id=str(telegram_id)).first()
-        )  # Преобразуем в строку
+        user = session.query(User).filter_by(telegram_id=telegram_id).first()
         session.close()
         return user
 
     def process_order(
-        self, telegram_id: int, cart_items: list, desired_time: str = None
-    ) -> int:
-        """Создать заказ из выбранных товаров"""
+        self,
+        telegram_id: int,
+        cart_items: list,
+        desired_time: str = None,
+        ready_in_minutes: int = None,
+    ) -> dict:
+        """Создать заказ из выбранных товаров
+
+        ready_in_minutes — через сколько минут клиент хочет забрать заказ
+        (None — как можно быстрее), используется для сортировки очереди.
+        Возвращает {"order_id": ID или None, "unavailable": [...]}, где
+        unavailable — товары корзины, которые больше нельзя заказать.
+        Если доступных товаров нет, заказ не создаётся.
+        """
         session = self.Session()
         try:
-            order = Order(
-                telegram_id=str(telegram_id),
-                status="Принят",
-                created_at=datetime.utcnow(),
+            result = self._insert_order(
+                session,
+                telegram_id,
+                [(item["item_id"], item["quantity"]) for item in cart_items],
                 desired_time=desired_time,
+                ready_in_minutes=ready_in_minutes,
             )
-            session.add(order)
-            session.flush()  # Получаем ID заказа
-
-            # Добавляем товары в заказ
-            for item in cart_items:
-                menu_item = (
-                    session.query(MenuItem).filter_by(id=item["item_id"]).first()
-                )
-                if menu_item and menu_item.is_available:
-                    order_item = OrderItem(
-                        order_id=order.id,
-                        menu_item_id=menu_item.id,
-                        quantity=item["quantity"],
-                        price_at_time=menu_item.price,
-                    )
-                    session.add(order_item)
-
             session.commit()
-            return order.id
+            return result
         except Exception as e:
             session.rollback()
             raise e
@@ -381,95 +851,296 @@ class Database:
     def notify_order_status(self, order_id: int) -> dict:
         """Получить информацию для уведомления о статусе заказа"""
         session = self.Session()
-        order = session.query(Order).filter_by(id=order_id).first()
-        if not order:
+        # Заказ, username и товары загружаются одним запросом
+        row = (
+            session.query(Order, User.username)
+            .outerjoin(Order.user)
+            .options(ORDER_ITEMS_JOINED)
+            .filter(Order.id == order_id)
+            .first()
+        )
+        if not row:
             session.close()
             return None
 
-        # Получаем username пользователя
-        user = session.query(User).filter_by(telegram_id=order.telegram_id).first()
-        username = user.username if user and user.username else "Нет username"
-
+        order, username = row
+        items, total = serialize_order_items(order)
         result = {
             "telegram_id": order.telegram_id,
             "order_id": order.id,
             "status": order.status,
             "desired_time": order.desired_time,
-            "username": username,
-            "items": [],
+            "username": username or "Нет username",
+            "items": items,
+            "total": total,
         }
 
-        total = 0
-        for item in order.items:
-            result["items"].append(
-                {
-                    "name": item.menu_item.name,
-                    "quantity": item.quantity,
-                    "price": item.price_at_time,
-                }
-            )
-            total += item.price_at_time * item.quantity
-        result["total"] = total
-
         session.close()
         return result
 
     def get_all_admins(self):
         """Получить список всех администраторов"""
-        session = self.Session()
-        admins = session.query(User).filter_by(is_admin=True).all()
-        result = [admin.telegram_id for admin in admins]
-        session.close()
+        return self.admin_cache.get_admins(self._load_admins)
+
+    @staticmethod
+    def _stats_columns(prefix: str, start_date=None, order_total=None):
+        """Агрегаты статистики за период (start_date=None — за все время)"""
+        in_period = Order.created_at >= start_date if start_date else true()
+
+        paid = in_period & (Order.status != OrderStatus.CANCELLED.value)
+
+        def count_if(condition):
+            return func.count(case((condition, Order.id)))
+
+        return [
+            count_if(in_period).label(f"{prefix}_total_orders"),
+            # Отменённые заказы в выручку не входят
+            func.coalesce(func.sum(case((paid, order_total), else_=0)), 0).label(
+                f"{prefix}_total_revenue"
+            ),
+            count_if(in_period & Order.status.in_(QUEUED_ORDER_STATUSES)).label(
+                f"{prefix}_pending_orders"
+            ),
+            count_if(in_period & Order.status.in_(COMPLETED_ORDER_STATUSES)).label(
+                f"{prefix}_completed_orders"
+            ),
+        ]
+
+    @staticmethod
+    def _order_totals_subquery():
+        """Сумма каждого заказа, посчитанная в БД"""
+        return (
+            select(
+                OrderItem.order_id,
+                func.sum(OrderItem.price_at_time * OrderItem.quantity).label("total"),
+            )
+            .group_by(OrderItem.order_id)
+            .subquery()
+        )
+
+    def _query_stats(self, session, periods: dict) -> dict:
+        """Посчитать статистику за несколько периодов одним запросом"""
+        totals = self._order_totals_subquery()
+        order_total = func.coalesce(totals.c.total, 0)
+
+        columns = []
+        for name, start_date in periods.items():
+            columns.extend(self._stats_columns(name, start_date, order_total))
+
+        row = (
+            session.query(*columns)
+            .select_from(Order)
+            .outerjoin(totals, totals.c.order_id == Order.id)
+            .one()
+        )._asdict()
+
+        result = {}
+        for name in periods:
+            result[name] = {
+                key: row[f"{name}_{key}"]
+                for key in (
+                    "total_orders",
+                    "total_revenue",
+                    "pending_orders",
+                    "completed_orders",
+                )
+            }
         return result
 
+    def _query_recent_orders(self, session, limit: int = 5, start_date=None):
+        """Последние заказы с суммой (ORDER BY/LIMIT в БД)"""
+        order_total = (
+            select(
+                func.coalesce(func.sum(OrderItem.price_at_time * OrderItem.quantity), 0)
+            )
+            .where(OrderItem.order_id == Order.id)
+            .correlate(Order)
+            .scalar_subquery()
+        )
+        query = session.query(
+            Order.id, Order.status, Order.created_at, order_total.label("total")
+        )
+        if start_date:
+            query = query.filter(Order.created_at >= start_date)
+        rows = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit)
+        return [
+            {
+                "id": row.id,
+                "status": row.status,
+                "total": row.total,
+                "created_at": row.created_at,
+            }
+            for row in rows
+        ]
+
     def get_orders_stats(self, period=None):
         """Получить статистику заказов за период"""
+        start_date = None
+        if period:
+            start_date = datetime.utcnow() - STATS_PERIODS[period]
+
         session = self.Session()
-        query = session.query(Order)
+        try:
+            stats = self._query_stats(session, {"period": start_date})["period"]
+            stats["orders"] = self._query_recent_orders(session, start_date=start_date)
+            return stats
+        finally:
+            session.close()
 
-        if period:
-            now = datetime.utcnow()
-            if period == "day":
-                start_date = now - timedelta(days=1)
-            elif period == "week":
-                start_date = now - timedelta(weeks=1)
-            elif period == "month":
-                start_date = now - timedelta(days=30)
-            query = query.filter(Order.created_at >= start_date)
+    def get_orders_stats_summary(self) -> dict:
+        """Получить статистику за все время, день, неделю и месяц
 
-        orders = query.all()
+        Все четыре периода считаются одним агрегирующим запросом, последние
+        5 заказов — вторым запросом с ORDER BY/LIMIT.
+        """
+        now = datetime.utcnow()
+        periods = {"all": None}
+        periods.update({name: now - delta for name, delta in STATS_PERIODS.items()})
 
-        stats = {
-            "total_orders": len(orders),
-            "total_revenue": 0,
-            "pending_orders": 0,
-            "completed_orders": 0,
-            "orders": [],
-        }
+        session = self.Session()
+        try:
+            stats = self._query_stats(session, periods)
+            stats["orders"] = self._query_recent_orders(session)
+            return stats
+        finally:
+            session.close()
 
-        for order in orders:
-            order_total = sum(
-                item.price_at_time * item.quantity for item in order.items
+    def _seconds_between(self, start, end):
+        """Разница end - start в секундах для текущего диалекта"""
+        if self.engine.dialect.name == "sqlite":
+            return (func.julianday(end) - func.julianday(start)) * 86400
+        return extract("epoch", end - start)
+
+    def _hour_bucket(self, column):
+        """Час, к которому относится момент времени (для группировки)"""
+        if self.engine.dialect.name == "sqlite":
+            return func.strftime("%Y-%m-%d %H", column)
+        return func.date_trunc("hour", column)
+
+    def _local_hour(self, column, offset_hours: int):
+        """Час суток (0-23) по местному времени кофейни"""
+        if self.engine.dialect.name == "sqlite":
+            return cast(
+                func.strftime("%H", column, f"{offset_hours:+d} hours"), Integer
+            )
+        return cast(extract("hour", column + timedelta(hours=offset_hours)), Integer)
+
+    @staticmethod
+    def _query_percentiles(session, seconds, condition, percents=(50, 90)) -> dict:
+        """Перцентили длительности методом ближайшего ранга
+
+        Ранг каждого значения и их число считаются оконными функциями,
+        нужные ранги выбираются агрегатом — всё одним запросом.
+        """
+        ranked = (
+            select(
+                seconds.label("seconds"),
+                func.row_number().over(order_by=seconds).label("row_rank"),
+                func.count().over().label("total"),
             )
-            stats["total_revenue"] += order_total
+            .where(condition)
+            .subquery()
+        )
+        # Ранг перцентиля p: ceil(p / 100 * n) в целочисленной арифметике
+        columns = [
+            func.max(
+                case(
+                    (
+                        ranked.c.row_rank == (ranked.c.total * percent + 99) // 100,
+                        ranked.c.seconds,
+                    )
+                )
+            ).label(f"p{percent}")
+            for percent in percents
+        ]
+        return session.execute(select(*columns)).one()._asdict()
+
+    def get_kitchen_metrics(self, period: str = "week") -> dict:
+        """Метрики работы кухни за период
+
+        Время приготовления (от оформления до готовности) и время до
+        уведомления клиента (от готовности до отправки сообщения) — 50-й и
+        90-й перцентили в секундах; среднее число заказов в час (по всем
+        часам периода, включая часы без заказов) и максимум за один час;
+        текущая очередь и возраст самого старого заказа в ней; распределение
+        заказов по часам суток (местное время).
+        """
+        now = datetime.utcnow()
+        start_date = now - STATS_PERIODS[period]
+        in_period = Order.created_at >= start_date
+        period_hours = STATS_PERIODS[period].total_seconds() / 3600
 
-            if order.status == "Принят":
-                stats["pending_orders"] += 1
-            elif order.status == "Готов":
-                stats["completed_orders"] += 1
+        session = self.Session()
+        try:
+            prep = self._query_percentiles(
+                session,
+                self._seconds_between(Order.created_at, Order.ready_at),
+                in_period & Order.ready_at.isnot(None),
+            )
+            notify = self._query_percentiles(
+                session,
+                self._seconds_between(Order.ready_at, Order.notified_at),
+                in_period & Order.notified_at.isnot(None),
+            )
 
-            if len(stats["orders"]) < 5:  # Сохраняем только последние 5 заказов
-                stats["orders"].append(
-                    {
-                        "id": order.id,
-                        "status": order.status,
-                        "total": order_total,
-                        "created_at": order.created_at,
-                    }
+            hourly_counts = (
+                select(func.count(Order.id).label("orders"))
+                .where(in_period)
+                .group_by(self._hour_bucket(Order.created_at))
+                .subquery()
+            )
+            throughput = session.execute(
+                select(
+                    func.sum(hourly_counts.c.orders), func.max(hourly_counts.c.orders)
                 )
+            ).one()
 
-        session.close()
-        return stats
+            queue = session.execute(
+                select(func.count(Order.id), func.min(Order.created_at)).where(
+                    Order.status.in_(QUEUED_ORDER_STATUSES)
+                )
+            ).one()
+
+            local_hour = self._local_hour(
+                Order.created_at, MetricsConfig.METRICS_UTC_OFFSET_HOURS
+            ).label("hour")
+            hourly = dict(
+                session.execute(
+                    select(local_hour, func.count(Order.id))
+                    .where(in_period)
+                    .group_by(local_hour)
+                    .order_by(local_hour)
+                ).all()
+            )
+        finally:
+            session.close()
+
+        return {
+            "period": period,
+            "prep_p50": prep["p50"],
+            "prep_p90": prep["p90"],
+            "notify_p50": notify["p50"],
+            "notify_p90": notify["p90"],
+            "orders_per_hour_avg": (throughput[0] or 0) / period_hours,
+            "orders_per_hour_max": throughput[1] or 0,
+            "queue_depth": queue[0],
+            "oldest_wait": (now - queue[1]).total_seconds() if queue[1] else None,
+            "hourly": hourly,
+        }
+
+    def mark_order_notified(self, order_id: int) -> None:
+        """Записать время отправки клиенту уведомления о готовности"""
+        session = self.Session()
+        try:
+            session.execute(
+                update(Order)
+                .where(Order.id == order_id)
+                .values(notified_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        finally:
+            session.close()
 
     def add_admin(self, admin_telegram_id: int, new_admin_telegram_id: int) -> bool:
         """Добавить нового администратора"""
@@ -479,7 +1150,7 @@ class Database:
             admin = (
                 session.query(User)
                 .filter_by(
-                    telegram_id=str(admin_telegram_id),  # Преобразуем в строку
+                    telegram_id=admin_telegram_id,
                     is_admin=True,
                 )
                 .first()
@@ -489,26 +1160,26 @@ class Database:
 
             # Создаем или обновляем пользователя
             user = (
-                session.query(User)
-                .filter_by(
-                    telegram_id=str(new_admin_telegram_id)  # Преобразуем в строку
-                )
-                .first()
+                session.query(User).filter_by(telegram_id=new_admin_telegram_id).first()
             )
             if not user:
                 user = User(
-                    telegram_id=str(new_admin_telegram_id),  # Преобразуем в строку
+                    telegram_id=new_admin_telegram_id,
                     is_admin=True,
                 )
                 session.add(user)
             else:
                 user.is_admin = True
 
+            self._notify_changed(session, "admins")
             session.commit()
+            self.admin_cache.invalidate()
             return True
-        except Exception as e:
+        except Exception:
             session.rollback()
-            print(f"Error adding admin: {e}")
+            logger.exception(
+                "Error adding admin", extra={"new_admin_id": new_admin_telegram_id}
+            )
             return False
         finally:
             session.close()
@@ -521,7 +1192,7 @@ class Database:
             admin = (
                 session.query(User)
                 .filter_by(
-                    telegram_id=str(admin_telegram_id),  # Преобразуем в строку
+                    telegram_id=admin_telegram_id,
                     is_admin=True,
                 )
                 .first()
@@ -530,19 +1201,84 @@ class Database:
                 return False
 
             # Находим и обновляем целевого пользователя
-            user = (
-                session.query(User)
-                .filter_by(telegram_id=str(target_telegram_id))  # Преобразуем в строку
-                .first()
-            )
+            user = session.query(User).filter_by(telegram_id=target_telegram_id).first()
             if user:
                 user.is_admin = False
+                self._notify_changed(session, "admins")
                 session.commit()
+                self.admin_cache.invalidate()
                 return True
             return False
         finally:
             session.close()
 
+    def get_user_states(self, max_age: timedelta = None) -> dict:
+        """Получить сохранённые user_data всех пользователей
+
+        Если задан max_age, состояния, не менявшиеся дольше, сначала
+        удаляются — брошенные корзины не копятся и не читаются при запуске.
+        """
+        session = self.Session()
+        try:
+            if max_age:
+                session.query(UserState).filter(
+                    UserState.updated_at < datetime.utcnow() - max_age
+                ).delete(synchronize_session=False)
+                session.commit()
+            rows = session.query(UserState.telegram_id, UserState.data).all()
+        finally:
+            session.close()
+        return {row.telegram_id: row.data for row in rows}
+
+    def get_user_state(self, telegram_id: int):
+        """Получить сохранённые user_data пользователя (None, если нет)"""
+        session = self.Session()
+        data = (
+            session.query(UserState.data)
+            .filter(UserState.telegram_id == telegram_id)
+            .scalar()
+        )
+        session.close()
+        return data
+
+    def save_user_states(self, updates: dict, drops=()) -> None:
+        """Сохранить пакет user_data одной транзакцией
+
+        Пустые user_data (в том числе вида {"cart": []}) не храним — они
+        удаляются вместе с drops.
+        """
+        rows = [
+            {"telegram_id": user_id, "data": data, "updated_at": datetime.utcnow()}
+            for user_id, data in updates.items()
+            if _has_user_state(data)
+        ]
+        to_delete = set(drops) | {
+            user_id for user_id, data in updates.items() if not _has_user_state(data)
+        }
+
+        session = self.Session()
+        try:
+            if rows:
+                stmt = self._upsert(UserState)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[UserState.telegram_id],
+                    set_={
+                        "data": stmt.excluded.data,
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                )
+                session.execute(stmt, rows)
+            if to_delete:
+                session.query(UserState).filter(
+                    UserState.telegram_id.in_(to_delete)
+                ).delete(synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
     def delete_menu_item(self, item_id: int) -> bool:
         """Удалить товар из меню"""
         session = self.Session()
@@ -550,8 +1286,98 @@ class Database:
             item = session.query(MenuItem).filter_by(id=item_id).first()
             if item:
                 item.is_available = False  # Мягкое удаление
+                self._notify_changed(session, "menu")
                 session.commit()
+                self.menu_cache.invalidate()
                 return True
             return False
         finally:
             session.close()
+
+
+# Асинхронная обёртка над Database для использования в обработчиках бота
+class AsyncDatabase:
+    """Выполняет методы Database в пуле потоков, не блокируя цикл событий.
+
+    Повторяет интерфейс Database: каждый метод становится корутиной,
+    например ``await db.get_menu_items()``.
+    """
+
+    def __init__(self, database: Database = None, max_workers: int = None):
+        self._database = database
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="db"
+        )
+
+    @property
+    def database(self) -> Database:
+        """Database создаётся при первом обращении, а не при импорте модуля"""
+        if self._database is None:
+            self._database = Database()
+        return self._database
+
+    def peek_pool_stats(self):
+        """Состояние пула соединений (None, если Database ещё не создана)"""
+        if self._database is None:
+            return None
+        return self._database.get_pool_stats()
+
+    async def _run(self, func, *args, **kwargs):
+        """Выполнить синхронную функцию в пуле потоков (с записью метрик)"""
+        loop = asyncio.get_running_loop()
+        # Контекст журнала и текущий спан обработчика переходят в поток пула
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor,
+            context.run,
+            observe_db_call,
+            func.__name__,
+            functools.partial(func, *args, **kwargs),
+            time.perf_counter(),
+        )
+
+    def __getattr__(self, name):
+        attr = getattr(self.database, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self._run(attr, *args, **kwargs)
+
+        # Кэшируем обёртку, чтобы не создавать её при каждом вызове
+        setattr(self, name, wrapper)
+        return wrapper
+
+    async def get_menu_items(self):
+        """Получить доступные товары (из кэша без перехода в пул потоков)"""
+        items = self.database.menu_cache.peek_available()
+        if items is None:
+            items = await self._run(self.database.get_menu_items)
+        return items
+
+    async def get_menu_item(self, item_id):
+        """Получить товар по ID (из кэша без перехода в пул потоков)"""
+        cached, item = self.database.menu_cache.peek_item(item_id)
+        if not cached:
+            item = await self._run(self.database.get_menu_item, item_id)
+        return item
+
+    async def create_user_if_not_exists(self, telegram_id: int, username: str = None):
+        """Зарегистрировать пользователя (из кэша без перехода в пул потоков)"""
+        if self.database.is_user_seen(telegram_id, username):
+            return
+        await self._run(self.database.create_user_if_not_exists, telegram_id, username)
+
+    async def is_admin(self, telegram_id):
+        """Проверить роль (из кэша без перехода в пул потоков)"""
+        is_admin = self.database.admin_cache.peek_contains(int(telegram_id))
+        if is_admin is None:
+            is_admin = await self._run(self.database.is_admin, telegram_id)
+        return is_admin
+
+    def close(self) -> None:
+        """Дождаться завершения запросов и закрыть соединения"""
+        self.executor.shutdown(wait=True)
+        if self._database is not None:
+            self._database.close()
@@ -0,0 +1,257 @@
+import time
+import logging
+import functools
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from telegram.ext import Application
+from telegram.request import HTTPXRequest
+from config import LoggingConfig
+from tracing import bind_log_context, log_context, span, update_log_fields
+
+logger = logging.getLogger(__name__)
+
+# Метрики обработчиков обновлений
+HANDLER_LATENCY = Histogram(
+    "bot_handler_duration_seconds",
+    "Время выполнения обработчика обновления",
+    ["handler"],
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total",
+    "Число исключений в обработчиках обновлений",
+    ["handler"],
+)
+
+# Метрики запросов к БД (число запросов — bot_db_query_duration_seconds_count)
+DB_QUERY_LATENCY = Histogram(
+    "bot_db_query_duration_seconds",
+    "Время выполнения метода Database в потоке пула",
+    ["method"],
+)
+DB_QUERY_ERRORS = Counter(
+    "bot_db_query_errors_total",
+    "Число исключений в методах Database",
+    ["method"],
+)
+DB_EXECUTOR_WAIT = Histogram(
+    "bot_db_executor_wait_seconds",
+    "Время ожидания свободного потока для запроса к БД",
+)
+
+# Метрики запросов к Telegram Bot API
+TELEGRAM_API_LATENCY = Histogram(
+    "bot_telegram_api_duration_seconds",
+    "Время запроса к Telegram Bot API",
+    ["method"],
+)
+TELEGRAM_API_ERRORS = Counter(
+    "bot_telegram_api_errors_total",
+    "Число неудачных запросов к Telegram Bot API",
+    ["method", "error"],
+)
+
+UPDATE_QUEUE_DEPTH = Gauge(
+    "bot_update_queue_depth",
+    "Число обновлений в очереди Application, ещё не переданных на обработку",
+)
+UPDATES_PENDING = Gauge(
+    "bot_updates_pending",
+    "Число обновлений, ожидающих своей очереди или обрабатываемых сейчас",
+)
+
+STARTUP_PHASE_SECONDS = Gauge(
+    "bot_startup_phase_seconds",
+    "Длительность фаз запуска бота",
+    ["phase"],
+)
+
+
+class DatabasePoolCollector:
+    """Метрики пула соединений БД, читаемые при каждом запросе /metrics
+
+    pool_stats — функция, возвращающая Database.get_pool_stats() или None,
+    пока подключение к БД не создано (метрики тогда не отдаются).
+    """
+
+    def __init__(self, pool_stats):
+        self.pool_stats = pool_stats
+
+    def collect(self):
+        stats = self.pool_stats()
+        if stats is None:
+            return
+        gauges = {
+            "bot_db_pool_size": ("Размер пула соединений", "pool_size"),
+            "bot_db_pool_checked_out": ("Выданные из пула соединения", "checked_out"),
+            "bot_db_pool_checked_in": ("Свободные соединения в пуле", "checked_in"),
+            "bot_db_pool_overflow": ("Соединения сверх pool_size", "overflow"),
+            "bot_db_pool_wait_max_seconds": (
+                "Наибольшее время ожидания соединения",
+                "wait_time_max",
+            ),
+        }
+        for name, (documentation, key) in gauges.items():
+            yield GaugeMetricFamily(name, documentation, value=stats[key])
+
+        counters = {
+            "bot_db_pool_checkouts": ("Число выдач соединений из пула", "checkouts"),
+            "bot_db_pool_wait_seconds": (
+                "Суммарное время ожидания соединения",
+                "wait_time_total",
+            ),
+            "bot_db_pool_overflow_events": (
+                "Число соединений, открытых сверх pool_size",
+                "overflow_events",
+            ),
+            "bot_db_pool_timeouts": (
+                "Число отказов по таймауту ожидания соединения",
+                "timeouts",
+            ),
+        }
+        for name, (documentation, key) in counters.items():
+            yield CounterMetricFamily(name, documentation, value=stats[key])
+
+
+def observe_db_call(method: str, call, queued_at: float = None):
+    """Выполнить вызов метода Database с записью времени выполнения и ошибок
+
+    queued_at — момент постановки вызова в очередь пула потоков
+    (time.perf_counter()), по нему считается время ожидания потока.
+    """
+    start = time.perf_counter()
+    if queued_at is not None:
+        DB_EXECUTOR_WAIT.observe(start - queued_at)
+    try:
+        with span(f"db.{method}", method=method):
+            return call()
+    except Exception:
+        DB_QUERY_ERRORS.labels(method).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        DB_QUERY_LATENCY.labels(method).observe(elapsed)
+        elapsed_ms = round(elapsed * 1000, 1)
+        if elapsed_ms >= LoggingConfig.LOG_SLOW_DB_MS:
+            logger.warning(
+                "Slow DB call", extra={"method": method, "elapsed_ms": elapsed_ms}
+            )
+        else:
+            logger.debug("DB call", extra={"method": method, "elapsed_ms": elapsed_ms})
+
+
+def timed_handler(callback):
+    """Обернуть обработчик обновления метриками, журналом и спаном
+
+    На время обработки в контекст журнала добавляются update_id, user_id
+    и имя обработчика — их получают и все записи из вызванных им методов.
+    """
+    name = callback.__name__
+    latency = HANDLER_LATENCY.labels(name)
+    errors = HANDLER_ERRORS.labels(name)
+
+    @functools.wraps(callback)
+    async def wrapper(update, context, *args):
+        token = bind_log_context(handler=name, **update_log_fields(update))
+        start = time.perf_counter()
+        outcome = "ok"
+        with span(f"handler.{name}", **log_context.get()):
+            try:
+                return await callback(update, context, *args)
+            except Exception:
+                errors.inc()
+                outcome = "error"
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                latency.observe(elapsed)
+                elapsed_ms = round(elapsed * 1000, 1)
+                extra = {"elapsed_ms": elapsed_ms, "outcome": outcome}
+                if elapsed_ms >= LoggingConfig.LOG_SLOW_HANDLER_MS:
+                    logger.warning("Slow handler", extra=extra)
+                else:
+                    logger.debug("Handler finished", extra=extra)
+                log_context.reset(token)
+
+    return wrapper
+
+
+def instrument_handlers(application: Application) -> None:
+    """Добавить метрики и журнал ко всем зарегистрированным обработчикам
+
+    У маршрутизатора кнопок оборачиваются обработчики отдельных действий,
+    чтобы метрики оставались разбиты по обработчикам.
+    """
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            router = getattr(handler, "router", None)
+            if router is not None:
+                router.wrap_callbacks(timed_handler)
+            else:
+                handler.callback = timed_handler(handler.callback)
+
+
+class StartupTimer:
+    """Замеряет фазы запуска бота
+
+    Каждая отметка mark(phase) завершает фазу, начавшуюся с предыдущей
+    отметки (или с started_at). report() пишет итог одной записью журнала.
+    """
+
+    def __init__(self, started_at: float = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.phases = {}
+        self._last = self.started_at
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.phases[phase] = round(elapsed * 1000, 1)
+        STARTUP_PHASE_SECONDS.labels(phase).set(elapsed)
+
+    def report(self) -> None:
+        total_ms = round((self._last - self.started_at) * 1000, 1)
+        logger.info(
+            "Startup finished in %s ms",
+            total_ms,
+            extra={"startup_ms": total_ms, "phases_ms": dict(self.phases)},
+        )
+
+
+class InstrumentedHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest, записывающий время и ошибки запросов к Bot API"""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs):
+        # URL вида https://api.telegram.org/bot<токен>/<метод> — токен в метки
+        # не попадает
+        api_method = url.rsplit("/", 1)[-1]
+        start = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+        except Exception as e:
+            TELEGRAM_API_ERRORS.labels(api_method, type(e).__name__).inc()
+            raise
+        finally:
+            TELEGRAM_API_LATENCY.labels(api_method).observe(time.perf_counter() - start)
+
+        if code >= 400:
+            TELEGRAM_API_ERRORS.labels(api_method, str(code)).inc()
+        return code, payload
+
+
+def start_metrics_server(
+    application: Application, port: int, addr: str, pool_stats=None
+) -> None:
+    """Запустить HTTP-сервер метрик Prometheus в отдельном потоке
+
+    pool_stats — источник метрик пула соединений (см. DatabasePoolCollector).
+    """
+    if pool_stats is not None:
+        REGISTRY.register(DatabasePoolCollector(pool_stats))
+    UPDATE_QUEUE_DEPTH.set_function(application.update_queue.qsize)
+    if hasattr(application.update_processor, "pending_updates"):
+        UPDATES_PENDING.set_function(
+            lambda: application.update_processor.pending_updates
+        )
+    start_http_server(port, addr=addr)
+    logger.info("Metrics server listening on http://%s:%s/metrics", addr, port)
@@ -0,0 +1,40 @@
+from alembic import context
+from sqlalchemy import create_engine, pool
+from config import DatabaseConfig
+from database import Base
+
+target_metadata = Base.metadata
+SCHEMA = Base.metadata.schema
+
+
+def run_migrations_offline() -> None:
+    """Сгенерировать SQL миграций без подключения к БД (alembic upgrade --sql)"""
+    context.configure(
+        url=DatabaseConfig.get_database_url(),
+        target_metadata=target_metadata,
+        version_table_schema=SCHEMA,
+        include_schemas=True,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Применить миграции к БД"""
+    engine = create_engine(DatabaseConfig.get_database_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            version_table_schema=SCHEMA,
+            include_schemas=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,76 @@
+"""Исходная схема: users, menu_items, orders, order_items
+
+Совпадает с таблицами, которые бот создавал через create_all до появления
+миграций; user_states создаёт отдельная миграция 0007.
+
+Для уже существующей базы, созданной через create_all, эту миграцию
+не применяют, а отмечают как выполненную: alembic stamp 0001
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+SCHEMA = Base.metadata.schema
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("telegram_id", sa.String(), nullable=False, unique=True),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "menu_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("is_available", sa.Boolean(), nullable=True),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("telegram_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("desired_time", sa.String(), nullable=True),
+        schema=SCHEMA,
+    )
+    op.create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "order_id",
+            sa.Integer(),
+            sa.ForeignKey(f"{SCHEMA}.orders.id"),
+            nullable=False,
+        ),
+        sa.Column(
+            "menu_item_id",
+            sa.Integer(),
+            sa.ForeignKey(f"{SCHEMA}.menu_items.id"),
+            nullable=False,
+        ),
+        sa.Column("quantity", sa.Integer(), nullable=True),
+        sa.Column("price_at_time", sa.Float(), nullable=False),
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("order_items", schema=SCHEMA)
+    op.drop_table("orders", schema=SCHEMA)
+    op.drop_table("menu_items", schema=SCHEMA)
+    op.drop_table("users", schema=SCHEMA)
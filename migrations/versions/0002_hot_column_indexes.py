@@ -0,0 +1,76 @@
+"""Индексы для частых выборок заказов
+
+Индексы создаются через CREATE INDEX CONCURRENTLY (вне транзакции),
+поэтому миграция не блокирует запись в рабочие таблицы.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+SCHEMA = Base.metadata.schema
+
+ACTIVE_ORDERS = sa.text("status = 'Принят'")
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_telegram_id_id",
+            "orders",
+            ["telegram_id", "id"],
+            schema=SCHEMA,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_orders_created_at",
+            "orders",
+            ["created_at"],
+            schema=SCHEMA,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_orders_active_created_at",
+            "orders",
+            ["created_at"],
+            schema=SCHEMA,
+            postgresql_where=ACTIVE_ORDERS,
+            sqlite_where=ACTIVE_ORDERS,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_order_items_order_id",
+            "order_items",
+            ["order_id"],
+            schema=SCHEMA,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in (
+            ("ix_order_items_order_id", "order_items"),
+            ("ix_orders_active_created_at", "orders"),
+            ("ix_orders_created_at", "orders"),
+            ("ix_orders_telegram_id_id", "orders"),
+        ):
+            op.drop_index(
+                name,
+                table_name=table,
+                schema=SCHEMA,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
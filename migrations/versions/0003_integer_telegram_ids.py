@@ -0,0 +1,45 @@
+"""Telegram ID как BIGINT вместо строки
+
+Существующие значения преобразуются приведением telegram_id::bigint.
+ALTER COLUMN TYPE перезаписывает таблицы users и orders под эксклюзивной
+блокировкой — на таблицах кофейни это доли секунды, но миграцию лучше
+запускать вне часа пик.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+SCHEMA = Base.metadata.schema
+
+
+def upgrade() -> None:
+    for table in ("users", "orders"):
+        with op.batch_alter_table(table, schema=SCHEMA) as batch_op:
+            batch_op.alter_column(
+                "telegram_id",
+                existing_type=sa.String(),
+                type_=sa.BigInteger(),
+                existing_nullable=False,
+                postgresql_using="telegram_id::bigint",
+            )
+
+
+def downgrade() -> None:
+    for table in ("users", "orders"):
+        with op.batch_alter_table(table, schema=SCHEMA) as batch_op:
+            batch_op.alter_column(
+                "telegram_id",
+                existing_type=sa.BigInteger(),
+                type_=sa.String(),
+                existing_nullable=False,
+                postgresql_using="telegram_id::text",
+            )
@@ -0,0 +1,66 @@
+"""Время, к которому нужно приготовить заказ (orders.desired_at)
+
+Для существующих заказов значение вычисляется из created_at и текста
+desired_time («Через N минут»). Индекс для очереди активных заказов
+создаётся через CREATE INDEX CONCURRENTLY.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+SCHEMA = Base.metadata.schema
+
+ACTIVE_ORDERS = sa.text("status = 'Принят'")
+
+
+def upgrade() -> None:
+    op.add_column("orders", sa.Column("desired_at", sa.DateTime()), schema=SCHEMA)
+
+    orders = sa.table(
+        "orders",
+        sa.column("created_at", sa.DateTime()),
+        sa.column("desired_time", sa.String()),
+        sa.column("desired_at", sa.DateTime()),
+        schema=SCHEMA,
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        minutes = sa.func.coalesce(
+            sa.func.substring(orders.c.desired_time, "[0-9]+").cast(sa.Integer), 0
+        )
+        desired_at = orders.c.created_at + sa.func.make_interval(0, 0, 0, 0, 0, minutes)
+    else:
+        desired_at = orders.c.created_at
+    op.execute(orders.update().values(desired_at=desired_at))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_active_desired_at",
+            "orders",
+            ["desired_at"],
+            schema=SCHEMA,
+            postgresql_where=ACTIVE_ORDERS,
+            sqlite_where=ACTIVE_ORDERS,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_orders_active_desired_at",
+            table_name="orders",
+            schema=SCHEMA,
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("orders", "desired_at", schema=SCHEMA)
@@ -0,0 +1,107 @@
+"""Статусы заказа как конечный автомат и время переходов
+
+Добавляет колонки started_at, ready_at, picked_up_at, cancelled_at и
+ограничение ck_orders_status на допустимые значения статуса. Раньше
+статус «Готов» означал выполненный заказ, поэтому такие заказы
+переводятся в «Выдан» — иначе они попали бы на доску активных заказов.
+Частичные индексы активных заказов пересоздаются с новым условием.
+В PostgreSQL ограничение добавляется как NOT VALID и проверяется
+отдельной командой VALIDATE CONSTRAINT, чтобы не блокировать запись.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+SCHEMA = Base.metadata.schema
+
+TIMESTAMP_COLUMNS = ("started_at", "ready_at", "picked_up_at", "cancelled_at")
+
+STATUSES = "'Принят', 'Готовится', 'Готов', 'Выдан', 'Отменён'"
+
+OLD_ACTIVE_ORDERS = sa.text("status = 'Принят'")
+NEW_ACTIVE_ORDERS = sa.text("status IN ('Принят', 'Готовится', 'Готов')")
+
+ACTIVE_INDEXES = (
+    ("ix_orders_active_created_at", "created_at"),
+    ("ix_orders_active_desired_at", "desired_at"),
+)
+
+
+def set_status(old: str, new: str) -> None:
+    orders = sa.table("orders", sa.column("status", sa.String()), schema=SCHEMA)
+    op.execute(orders.update().where(orders.c.status == old).values(status=new))
+
+
+def add_status_check() -> None:
+    context = op.get_context()
+    if context.dialect.name != "postgresql":
+        with op.batch_alter_table("orders", schema=SCHEMA) as batch_op:
+            batch_op.create_check_constraint(
+                "ck_orders_status", f"status IN ({STATUSES})"
+            )
+        return
+
+    # NOT VALID не проверяет существующие строки и держит эксклюзивную
+    # блокировку лишь мгновение; VALIDATE в отдельной транзакции читает
+    # таблицу под SHARE UPDATE EXCLUSIVE, не мешая записи новых заказов
+    orders = context.dialect.identifier_preparer.format_table(
+        sa.table("orders", schema=SCHEMA)
+    )
+    op.execute(
+        f"ALTER TABLE {orders} ADD CONSTRAINT ck_orders_status "
+        f"CHECK (status IN ({STATUSES})) NOT VALID"
+    )
+    with context.autocommit_block():
+        op.execute(f"ALTER TABLE {orders} VALIDATE CONSTRAINT ck_orders_status")
+
+
+def recreate_active_indexes(where) -> None:
+    with op.get_context().autocommit_block():
+        for name, column in ACTIVE_INDEXES:
+            op.drop_index(
+                name,
+                table_name="orders",
+                schema=SCHEMA,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+            op.create_index(
+                name,
+                "orders",
+                [column],
+                schema=SCHEMA,
+                postgresql_where=where,
+                sqlite_where=where,
+                postgresql_concurrently=True,
+            )
+
+
+def upgrade() -> None:
+    for column in TIMESTAMP_COLUMNS:
+        op.add_column("orders", sa.Column(column, sa.DateTime()), schema=SCHEMA)
+
+    set_status("Готов", "Выдан")
+    add_status_check()
+
+    recreate_active_indexes(NEW_ACTIVE_ORDERS)
+
+
+def downgrade() -> None:
+    recreate_active_indexes(OLD_ACTIVE_ORDERS)
+
+    with op.batch_alter_table("orders", schema=SCHEMA) as batch_op:
+        batch_op.drop_constraint("ck_orders_status", type_="check")
+    set_status("Готовится", "Принят")
+    set_status("Выдан", "Готов")
+
+    for column in reversed(TIMESTAMP_COLUMNS):
+        op.drop_column("orders", column, schema=SCHEMA)
@@ -0,0 +1,24 @@
+"""Время отправки клиенту уведомления о готовности (orders.notified_at)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+SCHEMA = Base.metadata.schema
+
+
+def upgrade() -> None:
+    op.add_column("orders", sa.Column("notified_at", sa.DateTime()), schema=SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_column("orders", "notified_at", schema=SCHEMA)
@@ -0,0 +1,44 @@
+"""Таблица сохранённого состояния пользователей (user_states)
+
+В базах, где таблицу уже создал бот (create_all) или прежняя редакция
+миграции 0001, она не пересоздаётся.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+SCHEMA = Base.metadata.schema
+
+
+def _table_exists() -> bool:
+    if op.get_context().as_sql:
+        # В офлайн-режиме (--sql) базы нет: таблица создаётся
+        return False
+    return sa.inspect(op.get_bind()).has_table("user_states", schema=SCHEMA)
+
+
+def upgrade() -> None:
+    if _table_exists():
+        return
+    op.create_table(
+        "user_states",
+        sa.Column(
+            "telegram_id", sa.BigInteger(), primary_key=True, autoincrement=False
+        ),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_states", schema=SCHEMA)
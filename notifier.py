@@ -0,0 +1,85 @@
+import asyncio
+from collections import OrderedDict
+from aiolimiter import AsyncLimiter
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+
+def _rate_limiter(rate: float) -> AsyncLimiter:
+    """Ограничитель на rate сообщений в секунду, в том числе дробное (0.5 — одно
+    сообщение в две секунды): AsyncLimiter не пропустит ни одного сообщения,
+    если в окно помещается меньше одного"""
+    if rate < 1:
+        return AsyncLimiter(1, 1 / rate)
+    return AsyncLimiter(rate, 1)
+
+
+# Рассылка уведомлений с учётом лимитов Telegram
+class Notifier:
+    """Отправляет сообщения через ограничители скорости: общий на бота
+    (global_rate сообщений в секунду) и отдельный на каждый чат
+    (per_chat_rate сообщений в секунду).
+
+    При RetryAfter ждёт указанное Telegram время, при сетевых ошибках —
+    с экспоненциальной задержкой, не более max_retries повторов.
+    """
+
+    # Сколько ограничителей отдельных чатов держим в памяти
+    MAX_CHAT_LIMITERS = 1024
+
+    def __init__(
+        self,
+        global_rate: float = 25,
+        per_chat_rate: float = 1,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+    ):
+        for rate in (global_rate, per_chat_rate):
+            if rate <= 0:
+                raise ValueError(f"Скорость отправки должна быть больше нуля: {rate}")
+        self.global_limiter = _rate_limiter(global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._chat_limiters = OrderedDict()
+
+    def _chat_limiter(self, chat_id) -> AsyncLimiter:
+        limiter = self._chat_limiters.get(chat_id)
+        if limiter is None:
+            limiter = self._chat_limiters[chat_id] = _rate_limiter(self.per_chat_rate)
+            if len(self._chat_limiters) > self.MAX_CHAT_LIMITERS:
+                self._chat_limiters.popitem(last=False)
+        else:
+            self._chat_limiters.move_to_end(chat_id)
+        return limiter
+
+    async def send_message(self, bot, chat_id, **kwargs):
+        """Отправить сообщение с ограничением скорости и повторами"""
+        attempt = 0
+        while True:
+            async with self._chat_limiter(chat_id):
+                async with self.global_limiter:
+                    try:
+                        return await bot.send_message(chat_id=chat_id, **kwargs)
+                    except RetryAfter as e:
+                        if attempt >= self.max_retries:
+                            raise
+                        delay = e.retry_after
+                    except BadRequest:
+                        # Наследник NetworkError, но повтор не поможет
+                        raise
+                    except NetworkError:
+                        if attempt >= self.max_retries:
+                            raise
+                        delay = self.base_delay * 2**attempt
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def broadcast(self, bot, chat_ids, **kwargs) -> list:
+        """Отправить одно сообщение в несколько чатов параллельно
+
+        Возвращает список результатов; для неудачных отправок — исключение.
+        """
+        return await asyncio.gather(
+            *(self.send_message(bot, chat_id, **kwargs) for chat_id in chat_ids),
+            return_exceptions=True,
+        )
@@ -0,0 +1,124 @@
+import asyncio
+from datetime import timedelta
+from telegram.ext import BasePersistence, PersistenceInput
+from database import AsyncDatabase
+
+
+# Хранение состояния пользователей (корзина, диалоги админки) в PostgreSQL
+class DatabasePersistence(BasePersistence):
+    """Persistence для Application, сохраняющая только user_data.
+
+    Application сам накапливает изменённые user_data и раз в update_interval
+    секунд вызывает update_user_data для каждого изменённого пользователя.
+    Эти вызовы собираются в один пакет и записываются в БД одной
+    транзакцией, поэтому нажатия кнопок не порождают синхронных записей.
+
+    При refresh_on_update=True перед каждым обновлением user_data
+    перечитывается из БД — нужно, если обновления одного пользователя
+    могут попадать на разные экземпляры бота.
+
+    Состояния, не менявшиеся дольше state_ttl_days дней, удаляются при
+    загрузке (0 — хранить бессрочно).
+    """
+
+    def __init__(
+        self,
+        db: AsyncDatabase,
+        update_interval: float = 10,
+        refresh_on_update: bool = False,
+        state_ttl_days: float = 0,
+    ):
+        super().__init__(
+            store_data=PersistenceInput(
+                bot_data=False, chat_data=False, user_data=True, callback_data=False
+            ),
+            update_interval=update_interval,
+        )
+        self.db = db
+        self.refresh_on_update = refresh_on_update
+        self.state_ttl = timedelta(days=state_ttl_days) if state_ttl_days else None
+        self._pending_updates = {}
+        self._pending_drops = set()
+        self._write_task = None
+
+    async def _write_pending(self) -> None:
+        # Пока идёт запись, могут накопиться новые изменения — пишем и их
+        while self._pending_updates or self._pending_drops:
+            updates, drops = self._pending_updates, self._pending_drops
+            self._pending_updates, self._pending_drops = {}, set()
+            try:
+                await self.db.save_user_states(updates, drops)
+            except Exception:
+                # Возвращаем неудачный пакет, не затирая более новые изменения
+                for user_id, data in updates.items():
+                    if user_id not in self._pending_drops:
+                        self._pending_updates.setdefault(user_id, data)
+                for user_id in drops:
+                    if user_id not in self._pending_updates:
+                        self._pending_drops.add(user_id)
+                raise
+
+    async def _schedule_write(self) -> None:
+        """Объединить все изменения текущего прохода в одну запись"""
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._write_pending())
+        await asyncio.shield(self._write_task)
+
+    async def get_user_data(self) -> dict:
+        return await self.db.get_user_states(self.state_ttl)
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._pending_drops.discard(user_id)
+        self._pending_updates[user_id] = data
+        await self._schedule_write()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._pending_updates.pop(user_id, None)
+        self._pending_drops.add(user_id)
+        await self._schedule_write()
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        # Незаписанные локальные изменения новее, чем данные в БД
+        if not self.refresh_on_update or user_id in self._pending_updates:
+            return
+        stored = await self.db.get_user_state(user_id)
+        if stored is not None:
+            user_data.clear()
+            user_data.update(stored)
+
+    async def flush(self) -> None:
+        await self._write_pending()
+
+    # Остальные виды данных бот не использует
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        return {}
+
+    async def update_conversation(self, name: str, key, new_state) -> None:
+        pass
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
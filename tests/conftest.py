@@ -0,0 +1,7 @@
+import os
+
+# Схема metadata задаётся при импорте database, поэтому окружение
+# настраивается до импорта модулей бота. Для SQLite схема — main
+os.environ.setdefault("DB_SCHEMA", "main")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("CACHE_NOTIFY_ENABLED", "false")
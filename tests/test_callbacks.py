@@ -0,0 +1,129 @@
+import pytest
+import callbacks as cb
+from callbacks import CallbackRouter, PrefixTrie
+from database import OrderStatus
+
+
+async def handler(update, context, *args):
+    return args
+
+
+@pytest.fixture
+def router():
+    router = CallbackRouter()
+    for action in (
+        cb.MENU,
+        cb.MAIN,
+        cb.ITEM,
+        cb.QUANTITY,
+        cb.ADD_TO_CART,
+        cb.ORDER_TIME,
+        cb.SET_ORDER_STATUS,
+        cb.ORDERS_BOARD_PAGE,
+        cb.MY_ORDERS_PAGE,
+    ):
+        router.add(action, handler)
+    return router
+
+
+def resolved_args(router, data):
+    route = router.resolve(data)
+    return None if route is None else route[1]
+
+
+@pytest.mark.parametrize(
+    "data, args",
+    [
+        (cb.ORDER_TIME(0), (0,)),
+        (cb.ORDER_TIME(45), (45,)),
+        (cb.QUANTITY(7, -1), (7, -1)),
+        (cb.SET_ORDER_STATUS(3, OrderStatus.READY), (3, OrderStatus.READY)),
+        (cb.ORDERS_BOARD_PAGE("created", 2), ("created", 2)),
+        (cb.MENU(), ()),
+    ],
+)
+def test_round_trip(router, data, args):
+    assert resolved_args(router, data) == args
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "",
+        "1:time:-30",
+        "1:time:999999",
+        "1:time:asap",
+        "1:qty:3:500",
+        "1:qty:3:0",
+        "1:qty:x:1",
+        "1:item",
+        "1:item:1:2",
+        "1:status:1:burnt",
+        "1:board_page:price:0",
+        "1:unknown",
+        "2:menu",
+    ],
+)
+def test_rejects_forged_payloads(router, data):
+    assert router.resolve(data) is None
+
+
+@pytest.mark.parametrize(
+    "value",
+    [lambda: cb.ORDER_TIME(20), lambda: cb.QUANTITY(1, 5), lambda: cb.ITEM("a:b")],
+)
+def test_encoding_rejects_invalid_arguments(value):
+    with pytest.raises(ValueError):
+        value()
+
+
+@pytest.mark.parametrize(
+    "data, args",
+    [
+        ("menu", ()),
+        ("back_to_main", ()),
+        ("order_5", (5,)),
+        ("increase_5", (5, 1)),
+        ("decrease_5", (5, -1)),
+        ("add_to_cart_5", (5,)),
+        ("time_asap", (0,)),
+        ("time_30", (30,)),
+        ("complete_order_9", (9, OrderStatus.READY)),
+    ],
+)
+def test_legacy_buttons(router, data, args):
+    assert resolved_args(router, data) == args
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "time_20",
+        "time_-30",
+        "time_asap_now",
+        "order_",
+        "order_x",
+        "increase_",
+        "men",
+        # Прежняя версия бота таких кнопок не выдавала
+        "set_status_1_ready",
+        "orders_board_desired_0",
+        "my_orders_older_5",
+    ],
+)
+def test_legacy_rejects_invalid_payloads(router, data):
+    assert router.resolve(data) is None
+
+
+def test_trie_longest_prefix():
+    trie = PrefixTrie()
+    trie.add("remove_admin", "list", exact=True)
+    trie.add("remove_admin_", "remove")
+    trie.add("menu", "menu", exact=True)
+
+    assert trie.longest_prefix("remove_admin") == ("list", "")
+    assert trie.longest_prefix("remove_admin_42") == ("remove", "42")
+    assert trie.longest_prefix("menu") == ("menu", "")
+    assert trie.longest_prefix("menu_1") is None
+    assert trie.longest_prefix("remove") is None
+    assert trie.longest_prefix("") is None
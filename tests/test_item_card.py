@@ -0,0 +1,75 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+import pytest
+import bot
+
+MESSAGE_ID = 10
+ITEM = {"id": 1, "name": "Капучино", "price": 200}
+
+
+@pytest.fixture
+def pause(monkeypatch):
+    """Пауза после перерисовки карточки, секунды"""
+    monkeypatch.setattr(bot.BotConfig, "QUANTITY_EDIT_DELAY_MS", 50)
+    return 0.05
+
+
+def make_context():
+    tasks = []
+    context = SimpleNamespace(
+        user_data={},
+        bot=SimpleNamespace(edit_message_text=AsyncMock()),
+        application=SimpleNamespace(
+            create_task=lambda coro, update=None: tasks.append(
+                asyncio.create_task(coro)
+            )
+        ),
+        tasks=tasks,
+    )
+    bot.open_item_card(context, MESSAGE_ID, ITEM, 1)
+    return context
+
+
+def tap(context, delta: int = 1):
+    query = SimpleNamespace(
+        answer=AsyncMock(),
+        message=SimpleNamespace(chat_id=5, message_id=MESSAGE_ID),
+    )
+    update = SimpleNamespace(callback_query=query)
+    return bot.update_quantity(update, context, ITEM["id"], delta)
+
+
+def shown_quantities(context) -> list:
+    return [
+        call.kwargs["reply_markup"].inline_keyboard[0][1].text
+        for call in context.bot.edit_message_text.await_args_list
+    ]
+
+
+def test_single_tap_is_rendered_immediately(pause):
+    async def run():
+        context = make_context()
+        await tap(context)
+        await asyncio.sleep(0)
+        assert shown_quantities(context) == ["2"]
+        await asyncio.gather(*context.tasks)
+
+    asyncio.run(run())
+
+
+def test_burst_of_taps_is_coalesced(pause):
+    async def run():
+        context = make_context()
+        await tap(context)
+        await asyncio.sleep(0)
+        for _ in range(4):
+            await tap(context)
+        assert shown_quantities(context) == ["2"]
+
+        await asyncio.gather(*context.tasks)
+        # Первое нажатие сразу, остальные четыре — одной правкой после паузы
+        assert shown_quantities(context) == ["2", "6"]
+        assert not bot.pending_card_edits
+
+    asyncio.run(run())
@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+import bot
+
+ORDER_PLACED = "✅ *Заказ успешно оформлен!*"
+EMPTY_CART = "Ваша корзина пуста"
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """База, оформляющая любой заказ под номером 1"""
+    database = SimpleNamespace(
+        process_order=AsyncMock(return_value={"order_id": 1, "unavailable": []})
+    )
+    monkeypatch.setattr(bot, "db", database)
+    return database
+
+
+def make_update_and_context():
+    query = SimpleNamespace(
+        from_user=SimpleNamespace(id=1),
+        answer=AsyncMock(),
+        edit_message_text=AsyncMock(),
+    )
+    update = SimpleNamespace(callback_query=query)
+    context = SimpleNamespace(
+        user_data={"cart": [{"item_id": 1, "quantity": 2}]},
+        # Уведомление администраторов в тесте не запускается
+        application=SimpleNamespace(
+            create_task=MagicMock(side_effect=lambda coro, **kwargs: coro.close())
+        ),
+    )
+    return update, context
+
+
+def sent_text(update) -> str:
+    return update.callback_query.edit_message_text.await_args.args[0]
+
+
+@pytest.mark.parametrize(
+    "handler",
+    [
+        bot.process_order_handler,
+        lambda update, context: bot.handle_order_time(update, context, 15),
+    ],
+)
+def test_second_tap_does_not_place_order_again(fake_db, handler):
+    update, context = make_update_and_context()
+
+    asyncio.run(handler(update, context))
+    assert sent_text(update).startswith(ORDER_PLACED)
+
+    asyncio.run(handler(update, context))
+    assert sent_text(update).startswith(EMPTY_CART)
+    fake_db.process_order.assert_awaited_once()
+
+
+def test_empty_result_is_not_reported_as_unavailable(fake_db):
+    # Корзину оформили параллельным нажатием: товаров в заказе нет
+    fake_db.process_order.return_value = {"order_id": None, "unavailable": []}
+    update, context = make_update_and_context()
+
+    asyncio.run(bot.handle_order_time(update, context, 0))
+
+    assert sent_text(update).startswith(EMPTY_CART)
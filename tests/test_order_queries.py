@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import event
+from database import Base, Database, User
+
+
+@pytest.fixture
+def make_database(tmp_path, monkeypatch):
+    """Фабрика баз SQLite: order_count заказов одного пользователя,
+    в каждом item_count разных товаров"""
+    databases = []
+
+    def make(order_count: int, item_count: int):
+        path = tmp_path / f"orders_{order_count}_{item_count}.db"
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+        database = Database()
+        databases.append(database)
+        Base.metadata.create_all(database.engine)
+
+        session = database.Session()
+        session.add(User(telegram_id=1, username="guest", is_admin=False))
+        session.commit()
+        session.close()
+
+        item_ids = [
+            database.add_menu_item(f"Напиток {number}", 100 + number)
+            for number in range(item_count)
+        ]
+        cart = [{"item_id": item_id, "quantity": 2} for item_id in item_ids]
+        order_ids = [
+            database.process_order(1, cart)["order_id"] for _ in range(order_count)
+        ]
+        return database, order_ids
+
+    yield make
+    for database in databases:
+        database.close()
+
+
+def count_statements(database: Database, call) -> int:
+    """Число SQL-запросов, выполненных во время call()"""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", on_execute)
+    try:
+        call()
+    finally:
+        event.remove(database.engine, "before_cursor_execute", on_execute)
+    return len(statements)
+
+
+@pytest.mark.parametrize(
+    "method",
+    ["get_user_orders", "get_all_orders", "get_order_details", "notify_order_status"],
+)
+@pytest.mark.parametrize(
+    "sizes",
+    [((1, 3), (20, 3)), ((1, 1), (1, 20))],
+    ids=["orders", "items"],
+)
+def test_query_count_does_not_grow(make_database, method, sizes):
+    """Число запросов не зависит ни от числа заказов, ни от товаров в заказе"""
+    counts = []
+    for order_count, item_count in sizes:
+        database, order_ids = make_database(order_count, item_count)
+        if method == "get_user_orders":
+            call = lambda: database.get_user_orders(1)
+        elif method == "get_all_orders":
+            call = database.get_all_orders
+        else:
+            call = lambda: getattr(database, method)(order_ids[-1])
+        counts.append(count_statements(database, call))
+
+    assert counts[0] > 0
+    assert counts[0] == counts[1]
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+import pytest
+from database import Base, Database, UserState
+
+CART = {"cart": [{"item_id": 1, "quantity": 2}]}
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'states.db'}")
+    database = Database()
+    Base.metadata.create_all(database.engine)
+    yield database
+    database.close()
+
+
+@pytest.mark.parametrize(
+    "data", [{}, {"cart": []}, {"cart": [], "item_card": None, "menu_action": ""}]
+)
+def test_empty_state_is_not_stored(database, data):
+    database.save_user_states({1: CART})
+    database.save_user_states({1: data})
+
+    assert database.get_user_states() == {}
+
+
+def test_state_with_values_is_stored(database):
+    database.save_user_states({1: CART, 2: {"cart": []}})
+
+    assert database.get_user_states() == {1: CART}
+
+
+def test_stale_states_are_pruned_on_load(database):
+    database.save_user_states({1: CART, 2: CART})
+    session = database.Session()
+    session.query(UserState).filter(UserState.telegram_id == 2).update(
+        {"updated_at": datetime.utcnow() - timedelta(days=31)}
+    )
+    session.commit()
+    session.close()
+
+    assert database.get_user_states(timedelta(days=30)) == {1: CART}
+    assert database.get_user_states() == {1: CART}
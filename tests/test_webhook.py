@@ -0,0 +1,61 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+import tornado.httpclient
+import tornado.httpserver
+import tornado.testing
+import tornado.web
+from webhook import WebhookHandler
+
+
+def post_update(body: str):
+    """Отправить тело POST-запросом на вебхук: (код ответа, очередь обновлений)"""
+
+    async def run():
+        bot_application = SimpleNamespace(bot=None, update_queue=asyncio.Queue())
+        app = tornado.web.Application(
+            [("/webhook", WebhookHandler, {"bot_application": bot_application})]
+        )
+        sock, port = tornado.testing.bind_unused_port()
+        server = tornado.httpserver.HTTPServer(app)
+        server.add_sockets([sock])
+        client = tornado.httpclient.AsyncHTTPClient()
+        try:
+            response = await client.fetch(
+                f"http://127.0.0.1:{port}/webhook",
+                method="POST",
+                body=body,
+                raise_error=False,
+            )
+        finally:
+            server.stop()
+        return response.code, bot_application.update_queue
+
+    return asyncio.run(run())
+
+
+def test_update_is_queued():
+    code, queue = post_update(json.dumps({"update_id": 1}))
+
+    assert code == 200
+    assert queue.get_nowait().update_id == 1
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "not json",
+        "[1]",
+        "1",
+        "null",
+        "{}",
+        '{"message": [1]}',
+        '{"update_id": 1, "message": [1]}',
+    ],
+)
+def test_invalid_body_is_client_error(body):
+    code, queue = post_update(body)
+
+    assert code == 400
+    assert queue.empty()
@@ -0,0 +1,101 @@
+import json
+import logging
+import contextlib
+import contextvars
+from datetime import datetime, timezone
+
+try:
+    from opentelemetry import trace
+except ImportError:  # Трассировка необязательна
+    trace = None
+
+# Поля текущего обновления (update_id, user_id, handler), которые
+# добавляются к каждой записи журнала. Задачи asyncio копируют контекст
+# при создании, в пул потоков БД он передаётся через copy_context()
+log_context = contextvars.ContextVar("log_context", default={})
+
+# Атрибуты LogRecord, которые не являются дополнительными полями (extra)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+}
+
+_tracer = None
+
+
+def bind_log_context(**fields):
+    """Добавить поля к контексту журнала; возвращает токен для сброса"""
+    return log_context.set({**log_context.get(), **fields})
+
+
+def update_log_fields(update: object) -> dict:
+    """Поля журнала, описывающие обновление Telegram"""
+    fields = {}
+    update_id = getattr(update, "update_id", None)
+    if update_id is not None:
+        fields["update_id"] = update_id
+    user = getattr(update, "effective_user", None)
+    if user:
+        fields["user_id"] = user.id
+    return fields
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись журнала как одну строку JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(log_context.get())
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+
+        if trace is not None:
+            span_context = trace.get_current_span().get_span_context()
+            if span_context.is_valid:
+                entry["trace_id"] = format(span_context.trace_id, "032x")
+                entry["span_id"] = format(span_context.span_id, "016x")
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: str = "INFO", log_format: str = "json") -> None:
+    """Настроить корневой журнал: JSON (по умолчанию) или обычный текст"""
+    handler = logging.StreamHandler()
+    if log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+    logging.basicConfig(level=level.upper(), handlers=[handler], force=True)
+    # httpx пишет каждый запрос к Bot API на уровне INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def enable_tracing(service_name: str = "k89-coffee-bot") -> None:
+    """Включить спаны OpenTelemetry для обработчиков и запросов к БД
+
+    Экспорт спанов настраивается стандартно для OpenTelemetry, например
+    запуском через opentelemetry-instrument с переменными OTEL_*.
+    """
+    global _tracer
+    if trace is None:
+        raise RuntimeError(
+            "Для трассировки установите пакеты opentelemetry-api и opentelemetry-sdk"
+        )
+    _tracer = trace.get_tracer(service_name)
+
+
+def span(name: str, **attributes):
+    """Спан OpenTelemetry вокруг блока кода (пустой, если трассировка выключена)"""
+    if _tracer is None:
+        return contextlib.nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
@@ -0,0 +1,64 @@
+import asyncio
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Обрабатывает обновления параллельно (не более max_concurrent_updates
+    одновременно), сохраняя порядок обновлений одного пользователя.
+
+    Пока обрабатывается обновление пользователя, следующие его обновления
+    ждут своей очереди и не занимают слоты общего лимита, поэтому два
+    быстрых нажатия на корзину не могут одновременно изменять user_data.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # ID пользователя -> [asyncio.Lock, число ожидающих и выполняющихся]
+        self._user_locks = {}
+        # Всего обновлений, ожидающих очереди или обрабатываемых сейчас
+        self.pending_updates = 0
+
+    @staticmethod
+    def _ordering_key(update: object):
+        if isinstance(update, Update):
+            if update.effective_user:
+                return update.effective_user.id
+            if update.effective_chat:
+                return update.effective_chat.id
+        return None
+
+    async def process_update(self, update: object, coroutine) -> None:
+        self.pending_updates += 1
+        try:
+            await self._process_in_order(update, coroutine)
+        finally:
+            self.pending_updates -= 1
+
+    async def _process_in_order(self, update: object, coroutine) -> None:
+        key = self._ordering_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        entry = self._user_locks.get(key)
+        if entry is None:
+            entry = self._user_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            # asyncio.Lock пропускает ожидающих в порядке очереди
+            async with entry[0]:
+                await super().process_update(update, coroutine)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._user_locks[key]
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import signal
+import logging
+import tornado.httpserver
+import tornado.web
+from telegram import Update
+from telegram.ext import Application
+
+# Заголовок, в котором Telegram передаёт secret_token вебхука
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookHandler(tornado.web.RequestHandler):
+    """Принимает обновления от Telegram и ставит их в очередь Application"""
+
+    def initialize(self, bot_application: Application, secret_token: str = None):
+        self.bot_application = bot_application
+        self.secret_token = secret_token
+
+    async def post(self):
+        if (
+            self.secret_token
+            and self.request.headers.get(SECRET_TOKEN_HEADER) != self.secret_token
+        ):
+            raise tornado.web.HTTPError(403)
+
+        # На 5xx Telegram повторяет доставку, поэтому любое некорректное
+        # тело — ошибка клиента (400), а не сервера
+        try:
+            data = json.loads(self.request.body)
+            if not isinstance(data, dict):
+                raise ValueError("Обновление должно быть JSON-объектом")
+            update = Update.de_json(data, self.bot_application.bot)
+        except (ValueError, TypeError, KeyError, AttributeError):
+            raise tornado.web.HTTPError(400)
+        # Для пустого объекта de_json возвращает None
+        if update is None:
+            raise tornado.web.HTTPError(400)
+
+        await self.bot_application.update_queue.put(update)
+        self.set_status(200)
+
+    def get(self):
+        # Проверка доступности для балансировщика нагрузки
+        self.write("ok")
+
+
+async def run_webhook(
+    application: Application,
+    listen: str = "0.0.0.0",
+    port: int = 8443,
+    url_path: str = "/webhook",
+    webhook_url: str = None,
+    secret_token: str = None,
+    max_connections: int = 40,
+) -> None:
+    """Запустить бота в режиме вебхука на локальном HTTP-сервере.
+
+    Application должен быть создан без Updater (``builder.updater(None)``).
+    Если webhook_url не задан, вебхук в Telegram не регистрируется — так
+    можно проверить бота локально, отправляя сохранённые JSON обновлений
+    POST-запросами на http://<listen>:<port><url_path>.
+    """
+    if not url_path.startswith("/"):
+        url_path = f"/{url_path}"
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: остановка по KeyboardInterrupt
+            pass
+
+    # post_init/post_shutdown вызываем сами, как это делает run_polling
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+
+    server = None
+    try:
+        if webhook_url:
+            await application.bot.set_webhook(
+                url=webhook_url,
+                secret_token=secret_token,
+                max_connections=max_connections,
+                allowed_updates=Update.ALL_TYPES,
+            )
+
+        await application.start()
+        server = tornado.httpserver.HTTPServer(
+            tornado.web.Application(
+                [
+                    (
+                        url_path,
+                        WebhookHandler,
+                        {
+                            "bot_application": application,
+                            "secret_token": secret_token,
+                        },
+                    )
+                ]
+            )
+        )
+        server.listen(port, address=listen)
+        logger.info(
+            "Webhook server listening on http://%s:%s%s", listen, port, url_path
+        )
+
+        await stop_event.wait()
+    finally:
+        if server:
+            server.stop()
+        if application.running:
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)